@@ -0,0 +1,43 @@
+'''
+Compares KMeans with one cluster against findCentroid on a 4K wallpaper.
+
+Usage: python benchmarks/centroid.py [--image PATH] [--repeat N]
+'''
+###
+# Modules
+###
+import argparse
+import numpy as np
+from common import makeWallpaper, timeCall
+
+from palettesnap.PaletteSnap import findCentroid
+from palettesnap.lut import convertColors
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compares KMeans with one cluster against findCentroid.")
+    parser.add_argument("--image", help="Wallpaper to use instead of a synthetic 3840x2160 one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each method. The fastest run is reported.")
+    options = parser.parse_args()
+    from sklearn.cluster import KMeans
+    if options.image is None:
+        rgbColors = makeWallpaper()
+    else:
+        from PIL import Image
+        rgbColors = np.asarray(Image.open(options.image).convert("RGB"))
+    height, width = rgbColors.shape[:2]
+    # cached pixel arrays are float32 Oklab
+    labColors = convertColors(rgbColors, "channel").reshape((-1, 3)).astype(np.float32)
+    print(f"{width}x{height} image, {len(labColors)} pixels")
+    kmeansTime, kmeans = timeCall(lambda: KMeans(n_clusters=1, n_init="auto").fit(labColors), repeat=options.repeat)
+    centroidTime, centroid = timeCall(findCentroid, labColors, repeat=options.repeat)
+    difference = np.max(np.abs(kmeans.cluster_centers_[0] - np.array(centroid)))
+    print(f"{'method':<16}{'time [s]':>10}")
+    print(f"{'KMeans':<16}{kmeansTime:>10.3f}")
+    print(f"{'findCentroid':<16}{centroidTime:>10.3f}")
+    print(f"speedup {kmeansTime / centroidTime:.1f}x, max centre difference {difference:.2e}")
+
+if __name__ == "__main__":
+    main()
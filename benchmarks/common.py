@@ -0,0 +1,48 @@
+'''
+Helpers shared by the benchmarks.
+
+Every benchmark is run from the repo root as python benchmarks/<name>.py.
+'''
+###
+# Modules
+###
+import os
+import sys
+import time
+import numpy as np
+import numpy.typing as npt
+
+###
+# Settings
+###
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# benchmarks use the palettesnap in this repo
+if repoDir not in sys.path:
+    sys.path.insert(0, repoDir)
+
+###
+# Helper functions
+###
+def makeWallpaper(width : int = 3840, height : int = 2160, seed : int = 0) -> npt.NDArray[np.uint8]:
+    '''returns a synthetic 8-bit wallpaper of smooth gradients, blobs of color, and noise'''
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    x /= width
+    y /= height
+    image = np.stack([0.05 + 0.9 * x * y, 0.1 + 0.8 * y, 0.2 + 0.6 * (1 - x)], axis=2)
+    # blobs give the image accent colors
+    for _ in range(12):
+        cx, cy, radius = rng.random(), rng.random(), rng.uniform(0.03, 0.15)
+        mask = (x - cx) ** 2 + ((y - cy) * height / width) ** 2 < radius ** 2
+        image[mask] = rng.random(3)
+    image += rng.normal(0, 0.02, image.shape).astype(np.float32)
+    return np.round(np.clip(image, 0, 1) * 255).astype(np.uint8)
+
+def timeCall(function, *args, repeat : int = 3, **kwargs) -> tuple[float, any]:
+    '''returns the fastest time of calling function and its result'''
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
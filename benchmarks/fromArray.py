@@ -0,0 +1,65 @@
+'''
+Compares the per-color cost of the scalar Color constructor against Color.fromArray.
+
+The scalar path builds each Color and reads every color space a palette uses,
+one colour-science call per color and space. fromArray converts all colors with
+one call per space.
+
+Usage: python benchmarks/fromArray.py [--colors N] [--repeat N]
+'''
+###
+# Modules
+###
+import argparse
+import numpy as np
+from common import timeCall
+
+from palettesnap.colorClass import Color
+
+###
+# Helper functions
+###
+def makeColors(count : int, seed : int = 0) -> np.ndarray:
+    '''returns random Oklab colors inside the usual lightness and chroma range'''
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(0.05, 0.95, count), rng.uniform(-0.2, 0.2, count), rng.uniform(-0.2, 0.2, count)])
+
+def scalarColors(labColors : np.ndarray) -> list[Color]:
+    '''builds each color and computes every color space one color at a time'''
+    colors = []
+    for L, a, b in labColors.tolist():
+        color = Color(L, a, b)
+        color.oklch, color.normalRgb, color.rgb, color.hex, color.hsl, color.cielab
+        colors.append(color)
+    return colors
+
+def largestDifference(before : list[Color], after : list[Color]) -> tuple[int, float]:
+    '''returns colors with a different hex, rgb, or hsl and the largest difference of the float spaces'''
+    mismatches = sum(old.hex != new.hex or old.rgb != new.rgb or old.hsl != new.hsl for old, new in zip(before, after))
+    difference = max(np.max(np.abs(np.subtract(getattr(old, space), getattr(new, space))))
+                     for old, new in zip(before, after) for space in ["oklch", "normalRgb", "cielab"])
+    return mismatches, difference
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compares the scalar Color constructor against Color.fromArray.")
+    parser.add_argument("--colors", type=int, default=500, help="Random Oklab colors to convert.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each path. The fastest run is reported.")
+    options = parser.parse_args()
+    labColors = makeColors(options.colors)
+    # the first call imports colour-science, which is left out of the timings
+    Color.fromArray(labColors[:1])
+    scalarTime, before = timeCall(scalarColors, labColors, repeat=options.repeat)
+    arrayTime, after = timeCall(Color.fromArray, labColors, repeat=options.repeat)
+    mismatches, difference = largestDifference(before, after)
+    print(f"{options.colors} colors")
+    print(f"{'path':<16}{'time [s]':>10}{'per color [us]':>16}")
+    print(f"{'scalar':<16}{scalarTime:>10.3f}{scalarTime / options.colors * 1e6:>16.1f}")
+    print(f"{'fromArray':<16}{arrayTime:>10.3f}{arrayTime / options.colors * 1e6:>16.1f}")
+    print(f"speedup {scalarTime / arrayTime:.1f}x, {mismatches} colors with a different hex, rgb, or hsl, "
+          f"max float difference {difference:.2e}")
+
+if __name__ == "__main__":
+    main()
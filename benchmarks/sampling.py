@@ -0,0 +1,64 @@
+'''
+Measures the palette drift of each sampling method against the full-resolution palette.
+
+The palette is picked with pickColors for every --sampling method at several
+--max-pixels values. For each palette key it prints the Oklab distance to the
+palette of the full image.
+
+Usage: python benchmarks/sampling.py [--image PATH] [--max-pixels N ...]
+'''
+###
+# Modules
+###
+import argparse
+import os
+import tempfile
+import time
+from common import makeWallpaper
+
+from palettesnap.console import console
+from palettesnap.colorClass import hexColor
+from palettesnap.PaletteSnap import pickColors
+from palettesnap.sampling import samplingMethods
+from palettesnap.setup import defaultAccents
+
+###
+# Helper functions
+###
+def runPick(imgPath : str, maxPixels : int, sampling : str) -> tuple[float, dict]:
+    '''picks the palette of the image without the pixel cache and returns the time it took and the palette'''
+    accentColors = {key: hexColor(value) for key, value in defaultAccents.items()}
+    start = time.perf_counter()
+    palette = pickColors(imgPath, accentColors, "auto", 5, 10000, maxPixels, sampling, cachePixels=False)
+    return time.perf_counter() - start, palette
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures the palette drift of each sampling method.")
+    parser.add_argument("--image", help="Wallpaper to use instead of a synthetic 3840x2160 one.")
+    parser.add_argument("--max-pixels", type=int, nargs="+", default=[2000000, 500000, 100000],
+                        help="Pixel budgets to sample.")
+    options = parser.parse_args()
+    # silence the palette logs
+    console.quiet = True
+    with tempfile.TemporaryDirectory() as tempDir:
+        imgPath = options.image
+        if imgPath is None:
+            from PIL import Image
+            imgPath = os.path.join(tempDir, "wallpaper.png")
+            Image.fromarray(makeWallpaper()).save(imgPath)
+        fullTime, fullPalette = runPick(imgPath, 0, "stride")
+        keys = list(fullPalette.keys())
+        print("Oklab distance of each key to the full-resolution palette")
+        print(f"{'sampling':<9}{'pixels':>9}{'time [s]':>9}" + "".join(f"{key[:6]:>7}" for key in keys) + f"{'max':>7}")
+        print(f"{'full':<9}{'all':>9}{fullTime:>9.2f}")
+        for maxPixels in options.max_pixels:
+            for sampling in samplingMethods:
+                duration, palette = runPick(imgPath, maxPixels, sampling)
+                drift = [palette[key].findDist(fullPalette[key]) for key in keys]
+                print(f"{sampling:<9}{maxPixels:>9}{duration:>9.2f}" + "".join(f"{value:>7.3f}" for value in drift) + f"{max(drift):>7.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+'''
+Compares the optimization solvers on the same fixed set of palettes.
+
+Every palette is a seeded random background lightness and ten accent
+lightnesses around a common lightness. The primary problem of performOptimal is solved with each solver,
+and the time, objective, and whether it converged are printed.
+
+Usage: python benchmarks/solvers.py [--palettes N] [--weight N] [--iterations N]
+'''
+###
+# Modules
+###
+import argparse
+import time
+import numpy as np
+import common  # puts the palettesnap of this repo on the path
+
+from palettesnap.console import console
+from palettesnap.colorOptimize import (optimizeSolvers, runSolver, constraint_1, constraint_1_jacobian,
+                                       constraint_2, constraint_2_jacobian)
+
+###
+# Helper functions
+###
+def findPalettes(count : int, seed : int = 0) -> list[tuple[float, np.ndarray]]:
+    '''returns the background lightness and the accent lightnesses of each palette'''
+    rng = np.random.default_rng(seed)
+    palettes = []
+    for _ in range(count):
+        # accents of an image sit around a common lightness, while constraint 2 keeps them within 20 of each other
+        center = rng.uniform(30, 70)
+        palettes.append((rng.uniform(5, 95), np.clip(center + rng.uniform(-12, 12, 10), 0, 100)))
+    return palettes
+
+def solvePalette(bgLight : float, lightList : np.ndarray, weight : int, iterations : int, solver : str) -> tuple[float, float, bool]:
+    '''solves the primary problem of performOptimal and returns the time, objective, and whether it converged'''
+    from scipy.optimize import Bounds
+    length = len(lightList)
+    bounds = Bounds([0] * length, [100] * length)
+    cons = [{'type': 'ineq', 'fun': constraint_1(bgLight), 'jac': constraint_1_jacobian(bgLight)},
+            {'type': 'ineq', 'fun': constraint_2, 'jac': constraint_2_jacobian}]
+    start = time.perf_counter()
+    result = runSolver(lightList.copy(), lightList, weight, bounds, cons, iterations, solver)
+    return time.perf_counter() - start, float(result.fun), bool(result.success)
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compares the optimization solvers on the same palettes.")
+    parser.add_argument("--palettes", type=int, default=20, help="Number of palettes to solve.")
+    parser.add_argument("--weight", type=int, default=100, help="Uniqueness weight.")
+    parser.add_argument("--iterations", type=int, default=10000, help="Maximum number of iterations.")
+    options = parser.parse_args()
+    # silence the solver logs
+    console.quiet = True
+    header = f"{'bg L':>6}" + "".join(f"{solver + ' [s]':>18}{'objective':>11}{'ok':>4}" for solver in optimizeSolvers)
+    print(header)
+    totals = {solver: [0.0, 0] for solver in optimizeSolvers}
+    for bgLight, lightList in findPalettes(options.palettes):
+        row = f"{bgLight:>6.1f}"
+        for solver in optimizeSolvers:
+            duration, objective, success = solvePalette(bgLight, lightList, options.weight, options.iterations, solver)
+            totals[solver][0] += duration
+            totals[solver][1] += success
+            row += f"{duration:>18.3f}{objective:>11.3f}{'yes' if success else 'no':>4}"
+        print(row)
+    for solver, (duration, converged) in totals.items():
+        print(f"{solver}: {duration:.2f} s in total, {converged} of {options.palettes} converged")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+'''
+Measures the cold-start latency of every palsnap subcommand.
+
+Each subcommand runs in a fresh interpreter with python -X importtime inside a
+temporary home, so it never touches your config, cache, or wallpaper.
+
+Usage: python benchmarks/startup.py [--repeat N] [--top N]
+'''
+###
+# Modules
+###
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+###
+# Settings
+###
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+runCode = "from palettesnap.cli import app; app()"
+# cache load and cache random are left out since they set the wallpaper
+commands = [
+    ["--help"],
+    ["gen", "{image}", "--skip", "--sample", "1000", "--solver", "SLSQP", "--cache", "bench"],
+    ["preview", "--no-image"],
+    ["batch", "{images}", "--sample", "1000", "--solver", "SLSQP", "--workers", "1"],
+    ["daemon", "--stop"],
+    ["cache", "list"],
+    ["cache", "check"],
+    ["cache", "rename", "bench", "renamed"],
+    ["cache", "remove", "bench"],
+    ["cache", "set", "other"],
+    ["cache", "clear", "--skip"],
+]
+
+###
+# Helper functions
+###
+def setUpHome(homeDir : str) -> dict[str, str]:
+    '''creates a home with a test image and returns the environment and paths to use'''
+    from PIL import Image
+    imageDir = os.path.join(homeDir, "images")
+    os.makedirs(imageDir)
+    imagePath = os.path.join(imageDir, "bench.png")
+    Image.radial_gradient("L").convert("RGB").resize((640, 360)).save(imagePath)
+    env = dict(os.environ, HOME=homeDir, XDG_CACHE_HOME=os.path.join(homeDir, ".cache"),
+               XDG_CONFIG_HOME=os.path.join(homeDir, ".config"), PYTHONPATH=repoDir, COLORTERM="truecolor")
+    # a fresh version check keeps the update check off the network
+    cacheDir = os.path.join(homeDir, ".cache", "palsnap")
+    os.makedirs(cacheDir)
+    with open(os.path.join(cacheDir, "version.json"), "w") as file:
+        json.dump({"latest": None, "checked": time.time()}, file)
+    return {"env": env, "image": imagePath, "images": imageDir}
+
+def parseImportTime(stderr : str) -> tuple[float, list[tuple[float, str]]]:
+    '''returns the total import time and the cumulative time of each top-level import in seconds'''
+    topLevel = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        selfTime, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented under the module importing them
+        if not name[1:].startswith(" "):
+            topLevel.append((int(cumulative) / 1e6, name.strip()))
+    # self times are skewed by imports in other threads, so the top-level cumulative times are added up
+    return sum(seconds for seconds, name in topLevel), topLevel
+
+def runCommand(args : list[str], home : dict[str, str]) -> tuple[float, float, list[tuple[float, str]]]:
+    '''runs a subcommand and returns its wall time, import time, and top-level imports'''
+    args = [arg.format(image=home["image"], images=home["images"]) for arg in args]
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", runCode, *args],
+                            env=home["env"], capture_output=True, text=True, input="")
+    end = time.perf_counter()
+    if result.returncode != 0:
+        raise Exception(f"palsnap {' '.join(args)} failed:\n{result.stdout}{result.stderr[-2000:]}")
+    importTime, topLevel = parseImportTime(result.stderr)
+    return end - start, importTime, topLevel
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures the cold-start latency of every palsnap subcommand.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each subcommand. The fastest run is reported.")
+    parser.add_argument("--top", type=int, default=3, help="Slowest top-level imports to show per subcommand.")
+    options = parser.parse_args()
+    print(f"{'command':<44}{'wall [s]':>10}{'imports [s]':>13}  slowest imports")
+    for args in commands:
+        runs = []
+        for _ in range(options.repeat):
+            # every run starts from the same fresh home
+            with tempfile.TemporaryDirectory() as homeDir:
+                home = setUpHome(homeDir)
+                # preview and cache commands need a current and a cached palette
+                if args[0] in ["preview", "cache"]:
+                    runCommand(commands[1], home)
+                runs.append(runCommand(args, home))
+        wallTime, importTime, topLevel = min(runs)
+        slowest = ", ".join(f"{name} {seconds:.2f}" for seconds, name in sorted(topLevel, reverse=True)[:options.top])
+        name = " ".join(arg for arg in args if not arg.startswith("{"))
+        print(f"{name[:43]:<44}{wallTime:>10.2f}{importTime:>13.2f}  {slowest}")
+
+if __name__ == "__main__":
+    main()
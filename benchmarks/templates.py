@@ -0,0 +1,144 @@
+'''
+Compares the compiled template engine against the old chain of str.replace calls.
+
+A Vim-style colorscheme of about 1.2 MB with 40000 variables is generated.
+It uses every kind of variable: hex, digits, rgb, normalized rgb, hsl, image,
+mode, lighten, darken, and modeInverse. The old engine is kept below as the
+reference.
+
+Usage: python benchmarks/templates.py [--groups N] [--repeat N]
+'''
+###
+# Modules
+###
+import argparse
+import os
+from re import sub, findall
+from common import timeCall
+
+from palettesnap.console import console
+from palettesnap.colorClass import Color, hexColor
+from palettesnap.setup import defaultAccents
+from palettesnap.templating import compileTemplate, renderTemplate
+
+###
+# Old template engine
+###
+def replaceVarChain(tempContents : str, palette : dict[str, Color], messages : list[str] | None = None) -> str:
+    '''replaces variable in template with colors in palette, adding warnings to messages if given'''
+    log = console.log if messages is None else messages.append
+    # replace vars with colors
+    modePattern = r"\{\{mode \| (.*?) \| (.*?)\}\}"
+    for key in palette:
+        if key == "image" or key == "mode":
+            # image/mode
+            tempContents = tempContents.replace("{{" + key + "}}", palette[key])
+            # special case for image
+            tempContents = tempContents.replace("{{image.name}}", os.path.basename(palette[key]))
+            # special case for mode
+            mode = palette["mode"]
+            tempContents = sub(modePattern, lambda match: match.group(1) if mode == 'light' else match.group(2), tempContents)
+        else:
+            # hex
+            tempContents = tempContents.replace("{{" + key + "}}", palette[key].hex)
+            tempContents = tempContents.replace("{{" + key + ".digits}}", (palette[key].hex)[1:])
+            # rgb
+            tempContents = tempContents.replace("{{" + key + ".r}}", str(palette[key].rgb[0]))
+            tempContents = tempContents.replace("{{" + key + ".g}}", str(palette[key].rgb[1]))
+            tempContents = tempContents.replace("{{" + key + ".b}}", str(palette[key].rgb[2]))
+            # normalized rgb
+            tempContents = tempContents.replace("{{" + key + ".nr}}", str(palette[key].normalRgb[0]))
+            tempContents = tempContents.replace("{{" + key + ".ng}}", str(palette[key].normalRgb[1]))
+            tempContents = tempContents.replace("{{" + key + ".nb}}", str(palette[key].normalRgb[2]))
+            # hsl
+            tempContents = tempContents.replace("{{" + key + ".h}}", str(palette[key].hsl[0]))
+            tempContents = tempContents.replace("{{" + key + ".s}}", str(palette[key].hsl[1]))
+            tempContents = tempContents.replace("{{" + key + ".l}}", str(palette[key].hsl[2]))
+    # lighten, darken, and mode inverse
+    lightenPattern = r"\{\{(.*?).lighten\(([0-9.\d]+)\)\}\}"
+    darkenPattern = r"\{\{(.*?).darken\(([0-9.\d]+)\)\}\}"
+    modeInversePattern = r"\{\{(.*?).modeInverse\(([0-9.\d]+)\)\}\}"
+    lightenMatches = findall(lightenPattern, tempContents)
+    darkenMatches = findall(darkenPattern, tempContents)
+    modeInverseMatches = findall(modeInversePattern, tempContents)
+    for match in lightenMatches:
+        name = match[0]
+        value = float(match[1])
+        if name in palette:
+            currColor = palette[name]
+            tempContents = tempContents.replace("{{" + name + ".lighten(" + str(value) + ")}}", Color.lighten(currColor, value).hex)
+        else:
+            log(f"Cannot lighten {name} with value {value}")
+    for match in darkenMatches:
+        name = match[0]
+        value = float(match[1])
+        if name in palette:
+            currColor = palette[name]
+            tempContents = tempContents.replace("{{" + name + ".darken(" + str(value) + ")}}", Color.darken(currColor, value).hex)
+        else:
+            log(f"Cannot darken {name} with value {value}")
+    for match in modeInverseMatches:
+        mode = palette["mode"]
+        name = match[0]
+        value = float(match[1])
+        # mode inverse darkens a color if the mode is light
+        # mode inverse lightens a color if the mode is dark
+        if name in palette:
+            currColor = palette[name]
+            if mode == "light":
+                newColor = Color.darken(currColor, value).hex
+            else:
+                newColor = Color.lighten(currColor, value).hex
+            tempContents = tempContents.replace("{{" + name + ".modeInverse(" + str(value) + ")}}", newColor)
+        else:
+            log(f"Cannot apply mode inverse to {name} with value {value}")
+    return tempContents
+
+###
+# Helper functions
+###
+def makeTemplate(groups : int) -> str:
+    '''returns a colorscheme with ten variables per highlight group'''
+    keys = ["bg", "fg"] + list(defaultAccents.keys())
+    adjusts = ["darken(0.2)", "lighten(0.1)", "modeInverse(0.3)"]
+    lines = ["\" {{image.name}} from {{image}}", "set background={{mode | light | dark}}"]
+    for idx in range(groups):
+        key = keys[idx % len(keys)]
+        other = keys[(idx * 7 + 3) % len(keys)]
+        lines.append(f"hi Group{idx} guifg={{{{{key}}}}} guisp=#{{{{{key}.digits}}}} gui=NONE cterm=NONE ctermfg=NONE blend=0"
+                     f" \" rgb({{{{{key}.r}}}}, {{{{{key}.g}}}}, {{{{{key}.b}}}})"
+                     f" hsl({{{{{other}.h}}}}, {{{{{other}.s}}}}%, {{{{{other}.l}}}}%) nr {{{{{key}.nr}}}}")
+        # the old engine only renders an adjusted color if no variable comes before it on its line
+        lines.append(f"hi Group{idx}Background guibg={{{{{other}.{adjusts[idx % len(adjusts)]}}}}} ctermbg=NONE gui=NONE cterm=NONE")
+    return "\n".join(lines) + "\n"
+
+def makePalette() -> dict[str, Color | str]:
+    '''returns a palette of the default accents with a background and foreground'''
+    palette = {"image": "/home/user/wallpapers/wallpaper.png", "mode": "dark",
+               "bg": hexColor("#1d2021"), "fg": hexColor("#ebdbb2")}
+    return palette | {key: hexColor(value) for key, value in defaultAccents.items()}
+
+###
+# Main function
+###
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compares the compiled template engine against the old str.replace chain.")
+    parser.add_argument("--groups", type=int, default=4000, help="Highlight groups, each with ten variables.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each engine. The fastest run is reported.")
+    options = parser.parse_args()
+    console.quiet = True
+    template = makeTemplate(options.groups)
+    palette = makePalette()
+    print(f"template of {len(template) / 1e6:.2f} MB with {template.count('{{')} variables")
+    chainTime, chainResult = timeCall(replaceVarChain, template, palette, [], repeat=options.repeat)
+    compileTime, tokens = timeCall(compileTemplate, template, repeat=options.repeat)
+    renderTime, result = timeCall(renderTemplate, tokens, palette, [], repeat=options.repeat)
+    print(f"{'engine':<24}{'time [s]':>10}")
+    print(f"{'str.replace chain':<24}{chainTime:>10.3f}")
+    print(f"{'compile':<24}{compileTime:>10.3f}")
+    print(f"{'render':<24}{renderTime:>10.3f}")
+    print(f"{'compile and render':<24}{compileTime + renderTime:>10.3f}")
+    print(f"identical output: {'yes' if result == chainResult else 'no'}")
+
+if __name__ == "__main__":
+    main()
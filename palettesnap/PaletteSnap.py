@@ -8,19 +8,25 @@ from .colorOptimize import performOptimal
 from .console import console
 from .colorClass import Color, rgbColor, hexColor, lchColor
 from .background import findBgGradient
+from .sampling import sampleColors, deduplicateColors
+from .pixelCache import findKey, loadPixels, savePixels
+from .clustering import findDominantColors
+from .medoid import findMedoid
+from .lut import convertColors, rgbToOklab
+from .streaming import streamImage
 
 # External Modules
 import numpy as np
 import numpy.typing as npt
 #import sklearn
 from pykdtree.kdtree import KDTree
-from kmedoids import fasterpam
-from sklearn.cluster import KMeans
-from sklearn.metrics import pairwise_distances
-from colour import read_image, sRGB_to_XYZ, XYZ_to_Oklab
+from colour import read_image
+from colour.models import JCh_to_Jab
 import concurrent.futures
 import mixbox
+import math
 import os
+import time
 import toml
 
 # Use python3 -m pip
@@ -35,44 +41,56 @@ def isValidHex(hexString : str) -> bool:
     # expand on this later
     return len(hexString) == 7
 
+# accent colors of palsnap.toml, kept while the file is unchanged for the daemon
+configCache = dict()
+
 def parseConfig() -> dict[str, Color]:
     '''parses palsnap.toml'''
     console.log("Defined accent colors:")
-    accentDict = toml.load(setup.palsnapFile)
-    # double check values
-    for key, value in accentDict.items():
-        if not isValidHex(value):
-            raise Exception("palsnap.toml is wrong")
-    accentDict = {key : hexColor(value) for key, value in accentDict.items()}
+    mtime = os.path.getmtime(setup.palsnapFile)
+    if configCache.get("mtime") != mtime:
+        accentDict = toml.load(setup.palsnapFile)
+        # double check values
+        for key, value in accentDict.items():
+            if not isValidHex(value):
+                raise Exception("palsnap.toml is wrong")
+        accentDict = {key : hexColor(value) for key, value in accentDict.items()}
+        configCache["mtime"] = mtime
+        configCache["accents"] = accentDict
+    accentDict = dict(configCache["accents"])
     console.log(accentDict)
     return accentDict
 
 ###
 # Finder Functions
 ##
-def findBackground(labColors : npt.NDArray[any], mode : str, dominant : int) -> Color:
+def findCentroid(labColors : npt.NDArray[any], weights : npt.NDArray[any] | None = None) -> tuple[float, float, float]:
+    '''returns the mean color, which is the cluster center of KMeans with one cluster'''
+    if weights is None:
+        # accumulate in float64 since cached colors are float32
+        centroid = np.mean(labColors, axis=0, dtype=np.float64)
+    else:
+        centroid = np.average(labColors, axis=0, weights=weights)
+    return tuple(centroid.tolist())
+
+def findBackground(labColors : npt.NDArray[any], mode : str, dominant : int, clusterEngine : str = "kmeans",
+                   weights : npt.NDArray[any] | None = None) -> Color:
     '''returns the background color for the palette'''
     if mode == "auto":
-        # Apply KMeans clustering
-        kmeans = KMeans(n_clusters=1)
-        kmeans.fit(labColors)
-        bgColors = kmeans.cluster_centers_
-        bgColors = tuple(bgColors[0])
-        return Color(*bgColors)
+        bgColor = findCentroid(labColors, weights)
+        return Color(*bgColor)
     else:
-        # Apply KMeans clustering
-        console.log(f"Using {dominant} dominant colors to find {mode} background color.")
-        kmeans = KMeans(n_clusters=dominant)
-        kmeans.fit(labColors)
-        bgColors = kmeans.cluster_centers_
-        bgColors = [tuple(labColor) for labColor in bgColors]
+        # Apply clustering
+        console.log(f"Using {dominant} dominant colors to find {mode} background color with {clusterEngine} clustering.")
+        bgColors = findDominantColors(labColors, dominant, clusterEngine, weights)
+        bgColors = [tuple(labColor) for labColor in bgColors.tolist()]
         bgColors = sorted(bgColors, key=lambda x: x[0])
         if mode == "dark":
             return Color(*bgColors[0])
         else:
             return Color(*bgColors[-1])
 
-def findForeground(bgColor : Color, labColors : npt.NDArray[any]) -> Color:
+def findForeground(bgColor : Color, labColors : npt.NDArray[any], weights : npt.NDArray[any] | None = None) -> Color:
     '''returns the foreground color for the palette'''
     L = bgColor.L
     threshold = 0.33
@@ -81,42 +99,54 @@ def findForeground(bgColor : Color, labColors : npt.NDArray[any]) -> Color:
     goodColors = labColors[filterArray]
     if goodColors.size == 0:
         raise Exception("No foreground found. Please lower threshold.")
-    # Apply KMeans clustering
-    kmeans = KMeans(n_clusters=1)
-    kmeans.fit(goodColors)
-    fgColor = kmeans.cluster_centers_
-    fgColor = tuple(fgColor[0])
+    goodWeights = None if weights is None else weights[filterArray]
+    fgColor = findCentroid(goodColors, goodWeights)
     fgColor = Color(*fgColor)
     return fgColor
 
-def filterColors(labColors : npt.NDArray[any], specialColor : tuple[int | float, int | float, int | float], numSample : int) -> Color:
-    '''filter colors in image based on a color'''
-    L, a, b = specialColor
-    specialColor = np.asarray([[L, a, b]])
-    # Filter to find a certain number of the most similar colors
+def findNearestColors(labColors : npt.NDArray[any], specialColors : list[tuple[int | float, int | float, int | float]], numSample : int,
+                      weights : npt.NDArray[any] | None = None) -> list[tuple[npt.NDArray[any], npt.NDArray[any] | None]]:
+    '''finds the most similar colors in image and their weights for every special color'''
+    specialColors = np.asarray(specialColors, dtype=labColors.dtype)
+    numNeighbors = min(numSample, len(labColors))
+    # Build the KD-tree once and query every special color in one batch
     kd_tree = KDTree(labColors)
-    dist, idx = kd_tree.query(specialColor, k=numSample)
-    filteredColors = labColors[idx]
-    # Eliminate channels
-    height, width, channels = filteredColors.shape
-    filteredColors = filteredColors.reshape((height * width, channels))
-    # Use KMedoids to find best one out of the sampled colors
-    distMatrix = pairwise_distances(filteredColors, filteredColors)
-    dominantIdx = fasterpam(distMatrix, 1)
-    finalColor = tuple(filteredColors[dominantIdx.medoids][0])
+    dist, idx = kd_tree.query(specialColors, k=numNeighbors)
+    idx = idx.reshape((len(specialColors), numNeighbors))
+    if weights is None:
+        return [(labColors[colorIdx], None) for colorIdx in idx]
+    # Distinct colors stand for many pixels, so keep just enough of them to cover numSample pixels
+    nearestColors = []
+    for colorIdx in idx:
+        colorWeights = np.asarray(weights[colorIdx], dtype=np.float64)
+        totalWeights = np.cumsum(colorWeights)
+        numKept = min(int(np.searchsorted(totalWeights, numSample)) + 1, len(colorIdx))
+        colorWeights = colorWeights[:numKept]
+        colorWeights[-1] -= max(0, totalWeights[numKept - 1] - numSample)
+        nearestColors.append((labColors[colorIdx[:numKept]], colorWeights))
+    return nearestColors
+
+def filterColors(filteredColors : npt.NDArray[any], medoid : str = "chunked", weights : npt.NDArray[any] | None = None) -> Color:
+    '''picks the best color out of the colors similar to a special color'''
+    # Use the medoid to find best one out of the sampled colors
+    dominantIdx = findMedoid(filteredColors, medoid, weights)
+    finalColor = tuple(filteredColors[dominantIdx].tolist())
     # Convert to Color
     return Color(*finalColor)
 
-def findAccentColors(labColors : npt.NDArray[any], extraDict : dict[str, Color], numSample : int) -> dict[str, Color]:
+def findAccentColors(labColors : npt.NDArray[any], extraDict : dict[str, Color], numSample : int, medoid : str = "chunked",
+                     weights : npt.NDArray[any] | None = None) -> dict[str, Color]:
     '''finds the accent colors'''
     resDict = dict()
-    values = [(key, value.oklab) for key, value in extraDict.items()]
+    keys = list(extraDict.keys())
+    # Filter the colors of every accent at once
+    nearestColors = findNearestColors(labColors, [value.oklab for value in extraDict.values()], numSample, weights)
     # Get the extra colors in parallel
     futureDict = dict()
     with concurrent.futures.ThreadPoolExecutor() as executor:
         # Find the futures
-        for key, value in values:
-            future = executor.submit(filterColors, labColors, value, numSample)
+        for key, (filteredColors, filteredWeights) in zip(keys, nearestColors):
+            future = executor.submit(filterColors, filteredColors, medoid, filteredWeights)
             futureDict[future] = key
         # Process result
         for future in concurrent.futures.as_completed(futureDict):
@@ -124,55 +154,36 @@ def findAccentColors(labColors : npt.NDArray[any], extraDict : dict[str, Color],
             result = future.result()
             resDict[key] = result
     # Rearrange key ordering
-    keyOrder = list(extraDict.keys())
-    resDict = {key : resDict[key] for key in keyOrder}
+    resDict = {key : resDict[key] for key in keys}
     return resDict
 
-def findColorHarmony(givenColor : Color) -> dict[str, Color]:
-    '''finds colors that are harmonious with the given color'''
+def findColorHarmony(givenColor : Color) -> npt.NDArray[any]:
+    '''finds the Oklab values of the colors that are harmonious with the given color'''
     # use Oklch color space
     light, chroma, hue = givenColor.oklch
-    harmonyColors = dict()
-    # complementary
-    comHue = (hue + 180) % 360
-    complementaryColor = (light, chroma, comHue)
-    harmonyColors["complementary"] = lchColor(complementaryColor)
-    # analogous
-    angHue1 = (hue + 30) % 360
-    angHue2 = (hue - 30) % 360
-    ang1 = (light, chroma, angHue1)
-    ang2 = (light, chroma, angHue2)
-    harmonyColors["analogous 1"] = lchColor(ang1)
-    harmonyColors["analogous 2"] = lchColor(ang2)
-    # split complementary
-    splitHue1 = (hue + 150) % 360
-    splitHue2 = (hue + 210) % 360
-    split1 = (light, chroma, splitHue1)
-    split2 = (light, chroma, splitHue2)
-    harmonyColors["split complementary 1"] = lchColor(split1)
-    harmonyColors["split complementary 2"] = lchColor(split2)
-    # triadic
-    triHue1 = (hue + 120) % 360
-    triHue2 = (hue + 240) % 360
-    tri1 = (light, chroma, triHue1)
-    tri2 = (light, chroma, triHue2)
-    harmonyColors["triadic 1"] = lchColor(tri1)
-    harmonyColors["triadic 2"] = lchColor(tri2)
-    # square (og, 90, 180, 270)
-    squareHue1 = (hue + 90) % 360
-    squareHue2 = (hue + 270) % 360
-    sq1 = (light, chroma, squareHue1)
-    sq2 = (light, chroma, squareHue2)
-    harmonyColors["square 1"] = lchColor(sq1)
-    harmonyColors["square 2"] = lchColor(sq2)
-    # tetradic (og, 60, 180, 240)
-    tetraHue1 = (hue + 60) % 360
-    tetraHue2 = (hue + 240) % 360
-    tetra1 = (light, chroma, tetraHue1)
-    tetra2 = (light, chroma, tetraHue2)
-    harmonyColors["tetradic 1"] = lchColor(tetra1)
-    harmonyColors["tetradic 2"] = lchColor(tetra2)
-    return harmonyColors
+    # hue offsets of each harmony
+    hueOffsets = {
+        # complementary
+        "complementary": 180,
+        # analogous
+        "analogous 1": 30,
+        "analogous 2": -30,
+        # split complementary
+        "split complementary 1": 150,
+        "split complementary 2": 210,
+        # triadic
+        "triadic 1": 120,
+        "triadic 2": 240,
+        # square (og, 90, 180, 270)
+        "square 1": 90,
+        "square 2": 270,
+        # tetradic (og, 60, 180, 240)
+        "tetradic 1": 60,
+        "tetradic 2": 240,
+    }
+    harmonyHues = (hue + np.array(list(hueOffsets.values()), dtype=float)) % 360
+    lchArray = np.column_stack((np.full(len(harmonyHues), light), np.full(len(harmonyHues), chroma), harmonyHues))
+    return JCh_to_Jab(lchArray)
 
 def findMode(bgColor : Color) -> str:
     '''finds the mode of the palette if given mode is auto'''
@@ -184,38 +195,62 @@ def findMode(bgColor : Color) -> str:
 ###
 # Manipulation Functions
 ###
-def processImage(imgPath : str) -> npt.NDArray[any]:
-    '''processes the image and returns an array of Oklab colors'''
+def processImage(imgPath : str, maxPixels : int = 0, sampling : str = "stride",
+                 dedup : bool = False, lut : str = "none", stream : bool = False,
+                 cachePixels : bool = True) -> tuple[npt.NDArray[any], npt.NDArray[any] | None]:
+    '''processes the image and returns an array of Oklab colors and their pixel counts if deduplicated'''
+    # Check the pixel cache first
+    if cachePixels:
+        key = findKey(imgPath, maxPixels, sampling, dedup, lut, stream)
+        cached = loadPixels(key, dedup)
+        if cached is not None:
+            console.log(f"Loaded cached [cyan]Oklab[/cyan] colors of image [u]{imgPath}[/u].")
+            return cached
+    # Decode and convert the image in strips
+    if stream:
+        console.log(f"Streaming image [u]{imgPath}[/u] to [cyan]Oklab[/cyan] color space with {lut} lookup table.")
+        labColors, weights = streamImage(imgPath, maxPixels, sampling, dedup, lut)
+        if dedup:
+            console.log(f"Found [magenta]{len(weights)} distinct colors[/magenta].")
+        if not cachePixels:
+            return labColors, weights
+        return savePixels(key, labColors, weights)
     # Get the colors
     console.log(f"Reading image [u]{imgPath}[/u].")
     rgbColors = read_image(imgPath, method="Imageio")
     rgbColors = rgbColors[..., 0:3]
+    # Bound the number of pixels
+    if maxPixels > 0:
+        console.log(f"Sampling at most [magenta]{maxPixels} pixels[/magenta] with {sampling} sampling.")
+        rgbColors = sampleColors(rgbColors, maxPixels, sampling)
+    # Only keep distinct colors
+    weights = None
+    if dedup:
+        rgbColors, weights = deduplicateColors(rgbColors)
+        console.log(f"Found [magenta]{len(weights)} distinct colors[/magenta].")
     # Convert colors to Oklab color space
-    console.log("Converting image colors to [cyan]Oklab[/cyan] color space.")
-    xyzColors = sRGB_to_XYZ(rgbColors)
-    labColors = XYZ_to_Oklab(xyzColors)
+    console.log(f"Converting image colors to [cyan]Oklab[/cyan] color space with {lut} lookup table.")
+    labColors = convertColors(rgbColors, lut)
     labColors = labColors.reshape((-1,3))
-    return labColors
+    # Cache the colors for later runs
+    if not cachePixels:
+        return labColors, weights
+    return savePixels(key, labColors, weights)
 
-def adjustAccents(colorDict : dict[str, Color], iterations : int, weight : int) -> dict[str, Color]:
+def adjustAccents(colorDict : dict[str, Color], iterations : int, weight : int, solver : str = "trust-constr",
+                  warmStart : bool = True) -> dict[str, Color]:
     '''adjusts lightness of accents based on background'''
     # based on https://github.com/jan-warchol/selenized/blob/master/balancing-lightness-of-colors.md
     bgLightness = colorDict["bg"].cielab[0]
     # adjust the lightness
-    newAccents = performOptimal(bgLightness, colorDict, iterations, weight)
+    newAccents = performOptimal(bgLightness, colorDict, iterations, weight, solver, warmStart)
     return newAccents
 
-def findClosestColor(colorDict : dict[str, Color], labColor : Color) -> str:
-    '''finds the color name in colorDict that labColor is closest to'''
-    # find the best color name
-    bestColor = None
-    bestDist = float("inf")
-    for (key, otherColor) in colorDict.items():
-        distance = Color.findDist(labColor, otherColor)
-        if distance < bestDist:
-            bestDist = distance
-            bestColor = key
-    return bestColor
+def findClosestColors(accentLab : npt.NDArray[any], labColors : npt.NDArray[any]) -> npt.NDArray[any]:
+    '''finds the index of the accent color that each of labColors is closest to'''
+    # argmin picks the first accent on ties
+    distances = np.linalg.norm(labColors[:, None] - accentLab[None, :], axis=2)
+    return distances.argmin(axis=1)
 
 def tweakColor(paletteColor : Color, orgColor : Color, hueThreshold, hueFactor, chromaThreshold, chromaFactor) -> Color:
     '''tweaks the chroma and hue of the color so that it is closer to the accent colors'''
@@ -238,42 +273,53 @@ def tweakColor(paletteColor : Color, orgColor : Color, hueThreshold, hueFactor,
 ###
 # Palette Functions
 ###
-def pickColors(imgPath : str, accentColors : dict[str, Color], mode : str, dominant : int, numSample : int) -> dict[str, Color]:
+def pickColors(imgPath : str, accentColors : dict[str, Color], mode : str, dominant : int, numSample : int,
+               maxPixels : int = 0, sampling : str = "stride", clusterEngine : str = "kmeans", medoid : str = "chunked",
+               dedup : bool = False, lut : str = "none", stream : bool = False, cachePixels : bool = True) -> dict[str, Color]:
     '''start picking colors from the image'''
     palette = dict()
-    labColors = processImage(imgPath)
+    labColors, weights = processImage(imgPath, maxPixels, sampling, dedup, lut, stream, cachePixels)
     # Background
     console.log("Finding background color.")
-    bg = findBackground(labColors, mode, dominant)
+    bg = findBackground(labColors, mode, dominant, clusterEngine, weights)
     palette["bg"] = bg
     # Foreground
     console.log("Finding foreground color.")
-    fg = findForeground(bg, labColors)
+    fg = findForeground(bg, labColors, weights)
     palette["fg"] = fg
     # Accents
-    console.log(f"Finding accents by sampling [magenta]{numSample} colors[/magenta].")
-    accentColors = findAccentColors(labColors, accentColors, numSample)
+    console.log(f"Finding accents by sampling [magenta]{numSample} colors[/magenta] with {medoid} medoids.")
+    accentColors = findAccentColors(labColors, accentColors, numSample, medoid, weights)
     palette |= accentColors
     return palette
 
-def expandPalette(accentColors : dict[str, Color], givenColor : Color, palette : dict[str, list[Color]]) -> dict[str, list[Color]]:
-    '''expand the modified palette with a given color by finding the corresponding label via accentColors'''
-    harmonyColors = findColorHarmony(givenColor)
-    # find closest color for each of the harmony colors and expand the palette
-    for key in harmonyColors:
-        # find the closest label
-        currColor = harmonyColors[key]
-        label = findClosestColor(accentColors, currColor)
-        # expand the palette
-        palette[label].append(currColor)
+def expandPalette(accentColors : dict[str, Color], palette : dict[str, Color], givenColors : list[Color]) -> dict[str, Color]:
+    '''replaces each palette color with the closest color to its accent among itself and the harmony colors labeled with it'''
+    keys = list(accentColors.keys())
+    accentLab = np.array([accentColors[key].oklab for key in keys], dtype=float)
+    paletteLab = np.array([palette[key].oklab for key in keys], dtype=float)
+    harmonyLab = np.concatenate([findColorHarmony(givenColor) for givenColor in givenColors])
+    # label every harmony color with its closest accent
+    labels = findClosestColors(accentLab, harmonyLab)
+    # distance of every candidate to each accent, with the palette color first so it wins ties
+    harmonyDist = np.linalg.norm(harmonyLab - accentLab[labels], axis=1)
+    candidateDist = np.full((len(keys), len(harmonyLab)), np.inf)
+    candidateDist[labels, np.arange(len(harmonyLab))] = harmonyDist
+    paletteDist = np.linalg.norm(paletteLab - accentLab, axis=1)
+    winners = np.column_stack((paletteDist, candidateDist)).argmin(axis=1)
+    # only the winning harmony colors become Color objects
+    for idx, key in enumerate(keys):
+        if winners[idx] > 0:
+            palette[key] = Color(*harmonyLab[winners[idx] - 1].tolist())
     return palette
 
-def exportPalette(colorDict : dict[str, Color]) -> None:
-    '''exports the palette'''
+def exportPalette(colorDict : dict[str, Color], exportPath : str | None = None) -> None:
+    '''exports the palette to exportPath or to palette.toml if no path is given'''
     strDict = {key: value for key, value in colorDict.items() if key == "image" or key == "mode"}
     colorDict : dict[str, str] = {key : value.hex for key, value in colorDict.items() if key != "image" and key != "mode"}
     colorDict = strDict | colorDict
-    exportPath = os.path.join(setup.cache, "palette.toml")
+    if exportPath is None:
+        exportPath = os.path.join(setup.cache, "palette.toml")
     with open(exportPath, "w") as file:
         toml.dump(colorDict, file)
     file.close()
@@ -282,24 +328,34 @@ def mixPalette(accentColors : dict[str, Color], palette : dict[str, Color], mixA
     '''mixes colors in palette with accent colors'''
     console.log(f"Mixing colors to increase color variety.")
     console.log(f"Mixing colors by {mixAmount * 100}% each iteration with threshold distance {mixThreshold}.")
-    numNeeded = len(accentColors.keys())
-    passed = set()
-    counter = 0
-    while len(passed) != numNeeded:
-        for key in accentColors:
-            counter += 1
-            paletteColor = palette[key].rgb
-            accentColor = accentColors[key].rgb
-            distance = Color.findDist(palette[key], accentColors[key])
-            # only mix by 10% if distance > 0.16
-            if distance > mixThreshold:
-                mixedColor = mixbox.lerp(paletteColor, accentColor, mixAmount)
-                # set mixed colors in palette
-                mixedColor = rgbColor(mixedColor)
-                palette[key] = mixedColor
-            else:
-                passed.add(key)
-    console.log(f"Mixed a total of {counter} times.")
+    if mixAmount <= 0 or mixAmount > 1:
+        raise Exception("Mix amount must be greater than 0 and at most 1.")
+    start = time.perf_counter()
+    keys = list(accentColors.keys())
+    accentLab = np.array([accentColors[key].oklab for key in keys])
+    paletteLab = np.array([palette[key].oklab for key in keys])
+    # mixing is linear in the mixbox latent space, so after n mixes z_n = z_accent + (1 - t)^n (z_0 - z_accent)
+    # stop once the remaining difference is below 1/512 of the start, past 8-bit precision
+    maxMixes = 1 if mixAmount == 1 else math.ceil(math.log(1 / 512) / math.log(1 - mixAmount))
+    startLatents = np.array([mixbox.rgb_to_latent(palette[key].rgb) for key in keys])
+    accentLatents = np.array([mixbox.rgb_to_latent(accentColors[key].rgb) for key in keys])
+    factors = (1 - mixAmount) ** np.arange(1, maxMixes + 1)
+    latents = accentLatents[:, None] + factors[None, :, None] * (startLatents - accentLatents)[:, None]
+    mixedRgb = np.array([mixbox.latent_to_rgb(latent) for latent in latents.reshape((-1, mixbox.LATENT_SIZE))])
+    mixedRgb = mixedRgb.reshape((len(keys), maxMixes, 3))
+    # distance of every mix of every color to its accent color
+    distances = np.linalg.norm(rgbToOklab(mixedRgb) - accentLab[:, None], axis=2)
+    passed = distances <= mixThreshold
+    # colors within the threshold are not mixed, the others use the first close enough mix
+    needMix = np.linalg.norm(paletteLab - accentLab, axis=1) > mixThreshold
+    mixCounts = np.where(passed.any(axis=1), passed.argmax(axis=1) + 1, maxMixes)
+    mixCounts = np.where(needMix, mixCounts, 0)
+    for idx, key in enumerate(keys):
+        if needMix[idx]:
+            palette[key] = rgbColor(tuple(mixedRgb[idx, mixCounts[idx] - 1].tolist()))
+    end = time.perf_counter()
+    console.log(f"Mix counts: {dict(zip(keys, mixCounts.tolist()))}.")
+    console.log(f"Mixed a total of {mixCounts.sum()} times in {end-start:.3f} seconds.")
     return palette
 
 ###
@@ -307,7 +363,10 @@ def mixPalette(accentColors : dict[str, Color], palette : dict[str, Color], mixA
 ###
 def extractPalette(imgPath : str, mode : str, dominant : int, extraFlag : bool, mixFlag : bool, tweakFlag : bool,  
                    numSample : int, mixAmount : float, mixThreshold : float, iterations : int, weight : int, 
-                   hueThreshold, hueFactor, chromaThreshold, chromaFactor, adjust : bool) -> dict[str, Color]:
+                   hueThreshold, hueFactor, chromaThreshold, chromaFactor, adjust : bool,
+                   maxPixels : int = 0, sampling : str = "stride", clusterEngine : str = "kmeans", medoid : str = "chunked",
+                   dedup : bool = False, lut : str = "none", stream : bool = False, solver : str = "trust-constr",
+                   export : bool = True, cachePixels : bool = True, warmStart : bool = True) -> dict[str, Color]:
     '''extracts the palette from the image'''
     # Get the accent values
     console.log("Reading [u]palsnap.toml[/u].")
@@ -315,36 +374,13 @@ def extractPalette(imgPath : str, mode : str, dominant : int, extraFlag : bool,
 
     console.log("Extracting palette.")
     imgPath = os.path.abspath(imgPath)
-    palette = pickColors(imgPath, accentColors, mode, dominant, numSample)
+    palette = pickColors(imgPath, accentColors, mode, dominant, numSample, maxPixels, sampling, clusterEngine, medoid, dedup, lut, stream, cachePixels)
 
     # harmony colors
     if extraFlag:
         console.log("Finding extra colors to improve color variety.")
-        bgColor = palette["bg"]
-        fgColor = palette["fg"]
-        palette = {key: [value] for key, value in palette.items()}
-        console.log("Getting colors harmonious to background.")
-        paletteExpanded = expandPalette(accentColors, bgColor, palette)
-        console.log("Getting colors harmonious to foreground.")
-        paletteExpanded = expandPalette(accentColors, fgColor, paletteExpanded)
-        # pick the color in the expanded palette with the least difference
-        for key in paletteExpanded:
-            possibleColors = paletteExpanded[key]
-            if len(possibleColors) == 1:
-                paletteExpanded[key] = possibleColors[0]
-            else:
-                orgColor = accentColors[key]
-                # find the best lab color
-                bestColor = None
-                bestDist = float("inf")
-                for currColor in possibleColors:
-                    distance = Color.findDist(orgColor, currColor)
-                    if distance < bestDist:
-                        bestColor = currColor
-                        bestDist = distance
-                paletteExpanded[key] = bestColor
-        # overwrite palette
-        palette : dict[str, Color] = paletteExpanded
+        console.log("Getting colors harmonious to background and foreground.")
+        palette = expandPalette(accentColors, palette, [palette["bg"], palette["fg"]])
 
     # mixing
     if mixFlag:
@@ -360,7 +396,7 @@ def extractPalette(imgPath : str, mode : str, dominant : int, extraFlag : bool,
     # adjusting
     if adjust:
         console.log(f"Adjusting palette with uniqueness weight {weight}.")
-        newPalette = adjustAccents(palette, iterations, weight)
+        newPalette = adjustAccents(palette, iterations, weight, solver, warmStart)
         palette = {**palette, **newPalette}
 
     # add image path and mode
@@ -386,7 +422,8 @@ def extractPalette(imgPath : str, mode : str, dominant : int, extraFlag : bool,
     console.log(palette)
 
     # export palette for preview
-    console.log("Exporting palette.")
-    exportPalette(palette)
+    if export:
+        console.log("Exporting palette.")
+        exportPalette(palette)
 
     return palette
\ No newline at end of file
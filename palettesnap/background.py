@@ -14,7 +14,7 @@ def findBgGradient(bgColor : Color, fgColor : Color) -> dict[str, Color]:
     bgDict = dict()
     # Get 5 gradient colors from background to foreground
     gradient = np.linspace(bgColor.oklab, fgColor.oklab, 7)
-    gradient = [Color(*tuple(labColor)) for labColor in gradient]
+    gradient = Color.fromArray(gradient[1:6])
     for i in range(1, 6):
-        bgDict[f"bg{i}"] = gradient[i]
+        bgDict[f"bg{i}"] = gradient[i - 1]
     return bgDict
\ No newline at end of file
@@ -0,0 +1,93 @@
+###
+# Modules
+###
+
+# External modules
+import os
+import time
+import toml
+import concurrent.futures
+
+# Internal modules
+from . import setup
+from .console import console
+from .PaletteSnap import extractPalette, exportPalette
+from .cache import indexEntry, updateIndex, saveDerived
+
+###
+# Helper functions
+###
+imageExtensions = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+def findImages(dirPath : str) -> list[str]:
+    '''returns the sorted paths of all images in the directory'''
+    allFiles = sorted(os.listdir(dirPath))
+    return [os.path.join(dirPath, file) for file in allFiles if file.lower().endswith(imageExtensions)]
+
+def findCacheName(imgPath : str) -> str:
+    '''returns the cached palette name of an image'''
+    name = os.path.splitext(os.path.basename(imgPath))[0]
+    # cached palette names cannot contain dots or be palette
+    name = name.replace(".", "_")
+    if name == "palette":
+        name = "palette_"
+    return name
+
+def initWorker() -> None:
+    '''silences the logs of worker processes'''
+    console.quiet = True
+
+def cacheImage(imgPath : str, cachePath : str, options : dict) -> tuple[float, dict]:
+    '''extracts the palette of an image, caches it and returns the time it took and its index entry'''
+    start = time.time()
+    palette = extractPalette(imgPath, **options, export=False)
+    exportPalette(palette, cachePath)
+    textPalette = toml.load(cachePath)
+    saveDerived(os.path.splitext(os.path.basename(cachePath))[0], textPalette)
+    end = time.time()
+    return end - start, indexEntry(textPalette)
+
+###
+# Main function
+###
+def batchPalettes(dirPath : str, workers : int | None, overwrite : bool, options : dict) -> None:
+    '''extracts and caches the palettes of all images in a directory in parallel'''
+    images = findImages(dirPath)
+    console.log(f"Found {len(images)} images in [u]{dirPath}[/u].")
+    # skip already cached images
+    jobs = dict()
+    namePaths = dict()
+    for imgPath in images:
+        name = findCacheName(imgPath)
+        cachePath = os.path.join(setup.cache, f"{name}.toml")
+        if name in namePaths:
+            # images such as w.png and w.jpg share a palette name
+            console.log(f"Palette name {name} already used by [u]{namePaths[name]}[/u]. Skipping [u]{imgPath}[/u].")
+            continue
+        namePaths[name] = imgPath
+        if os.path.exists(cachePath) and not overwrite:
+            console.log(f"Palette {name} already cached. Skipping [u]{imgPath}[/u].")
+        else:
+            jobs[name] = (os.path.abspath(imgPath), cachePath)
+    # extract palettes in parallel
+    console.log(f"Caching {len(jobs)} palettes.")
+    failed = 0
+    entries = dict()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initWorker) as executor:
+            futureDict = dict()
+            for name, (imgPath, cachePath) in jobs.items():
+                future = executor.submit(cacheImage, imgPath, cachePath, options)
+                futureDict[future] = name
+            for future in concurrent.futures.as_completed(futureDict):
+                name = futureDict[future]
+                try:
+                    duration, entries[name] = future.result()
+                    console.log(f"Palette {name} cached in {duration:.2f} seconds.")
+                except Exception as error:
+                    failed += 1
+                    console.log(f"[red]Failed[/red] to cache palette {name}: {error}")
+    finally:
+        # index all new palettes at once, even if interrupted
+        updateIndex(entries)
+    console.log(f"Cached {len(jobs) - failed} palettes with {failed} failures.")
@@ -4,6 +4,8 @@
 
 # External modules
 import os
+import json
+import shutil
 import toml
 from typer import confirm, Exit
 from random import choice
@@ -11,10 +13,116 @@ from random import choice
 # Internal modules
 from . import setup
 from .console import console
-from .colorClass import Color, hexColor
 from .preview import readPalette
+from .colorClass import Color, hexColor
 from .wallpaper import setWallpaper
 from .templating import exportAll
+from .pixelCache import pixelDir
+
+###
+# Cache index
+###
+# name, image, mode, and keys of every cached palette so they can be listed without reading each file
+indexPath = os.path.join(setup.cache, "index.json")
+
+def findCachedPalettes() -> list[str]:
+    '''returns the file names of all cached palettes in the cache dir'''
+    # the cache dir also holds palette.toml, preview files and the pixel cache
+    allFiles = os.listdir(setup.cache)
+    return [file for file in allFiles if file.endswith(".toml") and file != "palette.toml"]
+
+def indexEntry(textPalette : dict[str, str]) -> dict[str, str | list[str]]:
+    '''returns the index entry of a palette'''
+    return {"image": textPalette["image"], "mode": textPalette["mode"], "keys": list(textPalette.keys())}
+
+def readEntry(filePath : str) -> dict[str, str | list[str]] | None:
+    '''returns the index entry of a cached palette file or None if it is not a palette'''
+    # templates without a dir export into the cache dir, so not every toml file is a palette
+    try:
+        return indexEntry(toml.load(filePath))
+    except (OSError, toml.TomlDecodeError, KeyError):
+        return None
+
+def writeIndex(index : dict[str, dict | None]) -> None:
+    '''writes the index to the cache dir'''
+    tempPath = f"{indexPath}.{os.getpid()}.tmp"
+    with open(tempPath, "w") as file:
+        json.dump(index, file)
+    os.replace(tempPath, indexPath)
+
+def loadIndex(rebuild : bool = False) -> dict[str, dict | None]:
+    '''returns the index synced with the toml files in the cache dir, with None for files that are not palettes'''
+    try:
+        if rebuild:
+            raise FileNotFoundError(indexPath)
+        with open(indexPath, "r") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        console.log("Indexing cached palettes.")
+        index = dict()
+    # only files added outside of palsnap, such as copied or synced palettes, are read
+    synced = dict()
+    for fileName in findCachedPalettes():
+        name = os.path.splitext(fileName)[0]
+        synced[name] = index[name] if name in index else readEntry(os.path.join(setup.cache, fileName))
+    if synced != index:
+        writeIndex(synced)
+    return synced
+
+def readIndex(rebuild : bool = False) -> dict[str, dict]:
+    '''returns the index entries of the cached palettes, reading every palette again if rebuild is set'''
+    return {name: entry for name, entry in loadIndex(rebuild).items() if entry is not None}
+
+def updateIndex(changes : dict[str, dict | None]) -> None:
+    '''adds or replaces index entries, removing the ones set to None'''
+    index = loadIndex()
+    for name, entry in changes.items():
+        if entry is None:
+            index.pop(name, None)
+        else:
+            index[name] = entry
+    writeIndex(index)
+
+###
+# Precomputed colors
+###
+# color spaces of every cached palette so loading a palette does not convert colors
+derivedDir = os.path.join(setup.cache, "derived")
+
+def findDerivedPath(name : str) -> str:
+    '''returns the path of the precomputed colors of a cached palette'''
+    return os.path.join(derivedDir, f"{name}.json")
+
+def saveDerived(name : str, textPalette : dict[str, str]) -> dict[str, dict]:
+    '''computes the color spaces of a cached palette and saves them'''
+    hexDict = {key: value for key, value in textPalette.items() if key != "image" and key != "mode"}
+    derived = {key: hexColor(value).toDerived() for key, value in hexDict.items()}
+    os.makedirs(derivedDir, exist_ok=True)
+    derivedPath = findDerivedPath(name)
+    tempPath = f"{derivedPath}.{os.getpid()}.tmp"
+    with open(tempPath, "w") as file:
+        json.dump({"palette": hexDict, "colors": derived}, file)
+    os.replace(tempPath, derivedPath)
+    return derived
+
+def loadDerived(name : str, textPalette : dict[str, str]) -> dict[str, dict]:
+    '''returns the precomputed colors of a cached palette, computing them if missing or outdated'''
+    hexDict = {key: value for key, value in textPalette.items() if key != "image" and key != "mode"}
+    try:
+        with open(findDerivedPath(name), "r") as file:
+            derived = json.load(file)
+        if derived["palette"] == hexDict:
+            return derived["colors"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return saveDerived(name, textPalette)
+
+def removeDerived(name : str) -> None:
+    '''removes the precomputed colors of a cached palette'''
+    try:
+        os.remove(findDerivedPath(name))
+    except FileNotFoundError:
+        pass
 
 ###
 # Cache functions
@@ -36,6 +144,8 @@ def cacheSet(name : str) -> None:
                 with open(filePath, "w") as file:
                     toml.dump(palette, file)
                 file.close()
+                updateIndex({name: indexEntry(palette)})
+                saveDerived(name, palette)
                 console.log("Cache operation [green]completed[/green].")
             else:
                 console.log("Cache operation [red]canceled[/red].")
@@ -45,6 +155,8 @@ def cacheSet(name : str) -> None:
             with open(filePath, "w") as file:
                 toml.dump(palette, file)
             file.close()
+            updateIndex({name: indexEntry(palette)})
+            saveDerived(name, palette)
             console.log("Cache operation [green]completed[/green].")
 
 def loadCache(name : str) -> None:
@@ -65,7 +177,8 @@ def loadCache(name : str) -> None:
         # get the palette
         textPalette : dict[str, str] = toml.load(filePath)
         imgDict = {"image" : textPalette["image"], "mode" : textPalette["mode"]}
-        palette : dict[str, Color] = {key: hexColor(value) for key, value in textPalette.items() if key != "image" and key != "mode"}
+        derived = loadDerived(name, textPalette)
+        palette : dict[str, Color] = {key: Color.fromDerived(derived[key]) for key in derived}
         palette = imgDict | palette
         console.log("Cached file [green]succesfully[/green] loaded.")
         # overwrite palette.toml for previewing
@@ -81,16 +194,11 @@ def loadCache(name : str) -> None:
 
 def loadRandomCache():
     '''loads a random cached palette'''
-    cacheDir = setup.cache
     console.log("Randomly picking a cached palette.")
     # pick a random cached palette
-    exclude = ["palette.toml", "PaletteTest.html", "styles.css"]
-    allFiles = os.listdir(cacheDir)
-    cachedPalettes = [file for file in allFiles if file not in exclude]
-    fileName = choice(cachedPalettes)
-    console.log(f"Cached palette {fileName} chosen.")
+    name = choice(list(readIndex()))
+    console.log(f"Cached palette {name}.toml chosen.")
     # load it
-    name = os.path.splitext(fileName)[0]
     loadCache(name)
 
 
@@ -103,27 +211,28 @@ def removeCache(names : list[str]) -> None:
         for name in names:
             filePath= os.path.join(cacheDir, f"{name}.toml")
             os.remove(filePath)
+            removeDerived(name)
+            # update the index right away so a later missing name cannot leave it stale
+            updateIndex({name: None})
             console.log(f"Cached file {name} has been [green]succesfully[/green] cleared.")
 
 def clearCache() -> None:
     '''clears the cache'''
     cacheDir = setup.cache
-    exclude = ["palette.toml", "PaletteTest.html", "styles.css"]
-    for fileName in os.listdir(cacheDir):
+    for fileName in findCachedPalettes():
         filePath = os.path.join(cacheDir, f"{fileName}")
-        if os.path.isfile(filePath) and fileName not in exclude:
-            os.remove(filePath)
+        os.remove(filePath)
+    shutil.rmtree(derivedDir, ignore_errors=True)
+    shutil.rmtree(pixelDir, ignore_errors=True)
+    writeIndex(dict())
     console.log("Cache directory has been [green]succesfully[/green] cleared.")
 
 def listCache() -> None:
     '''counts and lists the cached palettes'''
-    cacheDir = setup.cache
-    exclude = ["palette.toml", "PaletteTest.html", "styles.css"]
-    allFiles = os.listdir(cacheDir)
-    cachedPalettes = [file for file in allFiles if file not in exclude]
+    cachedPalettes = readIndex()
     console.log(f"There are {len(cachedPalettes)} cached palettes:")
-    for file in cachedPalettes:
-        console.log(f"{file}")
+    for name in cachedPalettes:
+        console.log(f"{name}.toml")
     return None
 
 def renameCache(oldName : str, newName : str) -> None:
@@ -136,26 +245,23 @@ def renameCache(oldName : str, newName : str) -> None:
         oldPath = os.path.join(cacheDir, f"{oldName}.toml")
         newPath = os.path.join(cacheDir, f"{newName}.toml")
         os.rename(oldPath, newPath)
+        removeDerived(newName)
+        if os.path.exists(findDerivedPath(oldName)):
+            os.rename(findDerivedPath(oldName), findDerivedPath(newName))
+        # loading the index drops the old name and indexes the new one
+        loadIndex()
         console.log(f"Renamed {oldName}.toml to {newName}.toml.")
     
-def checkCache(name : str) -> bool:
+def checkCache(name : str, currKeys : list[str], index : dict[str, dict]) -> bool:
     '''checks a cached palette and makes sure it is legal'''
-    currPalette = list(readPalette().keys())
-    palettePath = os.path.join(setup.cache, f"{name}")
-    cachedPalette = list(toml.load(palettePath).keys())
-    if currPalette == cachedPalette:
-        return True
-    else:
-        return False
+    return index[name]["keys"] == currKeys
 
 def checkAll() -> None:
     '''checks all cached palettes and returns list of illegal ones'''
-    # Get all cached palettes
-    cacheDir = setup.cache
-    exclude = ["palette.toml", "PaletteTest.html", "styles.css"]
-    allFiles = os.listdir(cacheDir)
-    cachedPalettes = [file for file in allFiles if file not in exclude]
-    illegalPalettes = [palette for palette in cachedPalettes if not checkCache(palette)]
+    # Get all cached palettes, reading them again in case they changed outside of palsnap
+    index = readIndex(rebuild=True)
+    currKeys = list(readPalette().keys())
+    illegalPalettes = [f"{name}.toml" for name in index if not checkCache(name, currKeys, index)]
     count = len(illegalPalettes)
     if len(illegalPalettes) == 0:
         console.log("All palettes are well-defined.")
@@ -3,19 +3,24 @@
 ###
 
 # Internal Modules
+# palette extraction modules are imported by the commands that use them
 from . import setup
-from .PaletteSnap import extractPalette
-from .wallpaper import setWallpaper
-from .templating import exportAll
 from .console import console
-from .preview import previewPalette
+from .preview import previewPalette, previewImage
 from .cache import cacheSet, loadCache, loadRandomCache, removeCache, clearCache, listCache, renameCache, checkAll
 from .outdatedCheck import outdatedCheck
+from .sampling import samplingMethods
+from .clustering import clusterEngines
+from .medoid import medoidMethods
+from .lut import lutModes
+from .colorOptimize import optimizeSolvers
+from .daemon import forwardRequest, serveDaemon, stopDaemon
 
 # External Modules
 from typing import Annotated
 import typer
 import time
+import os
 
 ###
 # Functions
@@ -24,6 +29,44 @@ app = typer.Typer(context_settings={"help_option_names": ["-h", "--help"]})
 cache_app = typer.Typer(context_settings={"help_option_names": ["-h", "--help"]}, help="Manipulates the cache.")
 app.add_typer(cache_app, name="cache")
 
+def runGen(path : str, skip : bool, options : dict) -> None:
+    '''extracts the palette and applies it unless skip is set'''
+    from .PaletteSnap import extractPalette
+    from .wallpaper import setWallpaper
+    from .templating import exportAll
+    palette = extractPalette(path, **options)
+    if not skip:
+        # set wallpaper background
+        setWallpaper(path)
+        # export templates
+        exportAll(palette)
+
+def checkOptions(options : dict) -> None:
+    '''checks the palette extraction options shared by gen and batch'''
+    mode, dominant = options["mode"], options["dominant"]
+    if mode not in ["auto", "light", "dark"]:
+        raise typer.BadParameter(f"{mode} is not a valid mode. Allowed values are auto, light, and dark.")
+    if options["clusterEngine"] not in clusterEngines:
+        raise typer.BadParameter(f"{options['clusterEngine']} is not a valid clustering engine. Allowed values are kmeans, minibatch, and histogram.")
+    if options["medoid"] not in medoidMethods:
+        raise typer.BadParameter(f"{options['medoid']} is not a valid medoid method. Allowed values are exact, chunked, approx, and weiszfeld.")
+    if options["sampling"] not in samplingMethods:
+        raise typer.BadParameter(f"{options['sampling']} is not a valid sampling method. Allowed values are stride, resize, and random.")
+    if options["lut"] not in lutModes:
+        raise typer.BadParameter(f"{options['lut']} is not a valid lookup table. Allowed values are none, channel, and full.")
+    if options["solver"] not in optimizeSolvers:
+        raise typer.BadParameter(f"{options['solver']} is not a valid solver. Allowed values are trust-constr and SLSQP.")
+    if options["maxPixels"] < 0:
+        raise typer.BadParameter("Maximum number of pixels must be >= 0.")
+    if options["stream"] and options["maxPixels"] == 0 and not options["dedup"]:
+        raise typer.BadParameter("Streaming needs --max-pixels or --dedup since it otherwise keeps every pixel.")
+    if options["mixAmount"] <= 0 or options["mixAmount"] > 1:
+        raise typer.BadParameter("Mix amount must be > 0 and <= 1.")
+    if dominant <= 1:
+        console.log("Illegal number of dominant colors.")
+    if mode == "auto" and dominant != 5:
+        console.log("Mode must not be auto for dominant option to be used.")
+
 # gen command
 @app.command()
 def gen(
@@ -50,6 +93,13 @@ def gen(
             help="Number of dominant colors to pick from image for background. Must be >= 2.", rich_help_panel="Options"
         ),
     ] = 5,
+    clusterEngine : Annotated[
+        str,
+        typer.Option(
+            "--cluster-engine",
+            help="Clustering engine for dominant colors. kmeans, minibatch, or histogram.", rich_help_panel="Options"
+        ),
+    ] = "kmeans",
     extra: Annotated[
         bool,
         typer.Option(
@@ -61,14 +111,14 @@ def gen(
         bool,
         typer.Option(
             "--mix",
-            help="Toggles extra colors.", rich_help_panel="Variety"
+            help="Toggles mixing palette colors with accent colors.", rich_help_panel="Variety"
         ),
     ] = False,
     tweak: Annotated[
         bool,
         typer.Option(
             "--tweak",
-            help="Toggles extra colors.", rich_help_panel="Variety"
+            help="Toggles tweaking the hue and chroma of palette colors toward accent colors.", rich_help_panel="Variety"
         ),
     ] = False,
     sample : Annotated[
@@ -78,6 +128,13 @@ def gen(
             rich_help_panel="Options"
         ),
     ] = 10000,
+    medoid : Annotated[
+        str,
+        typer.Option(
+            help="Medoid method for accent colors. exact, chunked, approx, or weiszfeld.",
+            rich_help_panel="Options"
+        ),
+    ] = "chunked",
     mixAmount: Annotated[
         float,
         typer.Option(
@@ -107,6 +164,21 @@ def gen(
             rich_help_panel="Options"
         ),
     ] = 100,
+    solver : Annotated[
+        str,
+        typer.Option(
+            help="Solver for optimization. trust-constr or SLSQP.",
+            rich_help_panel="Options"
+        ),
+    ] = "trust-constr",
+    warmStart : Annotated[
+        bool,
+        typer.Option(
+            " /--no-warm-start",
+            help="Do not start optimization from stored solutions, so results do not depend on earlier runs.",
+            rich_help_panel="Options"
+        ),
+    ] = True,
     cache : Annotated[
         str | None,
         typer.Option(
@@ -142,41 +214,72 @@ def gen(
             help="Factor of defined accent color chroma. 0 to 1.", rich_help_panel="Tweak Settings"
         ),
     ] = 0.25,
+    maxPixels : Annotated[
+        int,
+        typer.Option(
+            "--max-pixels",
+            help="Maximum number of pixels to use from image. 0 uses every pixel.", rich_help_panel="Sampling Settings"
+        ),
+    ] = 0,
+    sampling : Annotated[
+        str,
+        typer.Option(
+            help="Sampling method when max pixels is set. stride, resize, or random.", rich_help_panel="Sampling Settings"
+        ),
+    ] = "stride",
+    dedup: Annotated[
+        bool,
+        typer.Option(
+            "--dedup",
+            help="Only process distinct colors weighted by their number of pixels.", rich_help_panel="Sampling Settings"
+        ),
+    ] = False,
+    lut : Annotated[
+        str,
+        typer.Option(
+            help="Lookup table for converting 8-bit colors to Oklab. none, channel, or full.", rich_help_panel="Sampling Settings"
+        ),
+    ] = "none",
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            help="Convert the decoded 8-bit image in strips so only it and the sampled or distinct colors are kept in memory. Needs --max-pixels or --dedup.", rich_help_panel="Sampling Settings"
+        ),
+    ] = False,
+    pixelCache: Annotated[
+        bool,
+        typer.Option(
+            " /--no-pixel-cache",
+            help="Do not cache the Oklab colors of the image for later runs. The cache keeps up to PALSNAP_PIXEL_CACHE_SIZE MiB, 2048 by default.", rich_help_panel="Sampling Settings"
+        ),
+    ] = True,
 ):
     '''
     Generates color palette given path to image and optional arguments.
     '''
     outdatedCheck()
-    # precheck
-    if mode not in ["auto", "light", "dark"]:
-        raise typer.BadParameter(f"{mode} is not a valid mode. Allowed values are auto, light, and dark.")
-    if dominant <= 1:
-        console.log("Illegal number of dominant colors.")
-    if mode == "auto" and dominant != 5:
-        console.log("Mode must not be auto for dominant option to be used.")
     # functionality
-    if skip:
-        start = time.time()
-        # Only create palette
-        palette = extractPalette(path, mode, dominant, extra, mix, tweak, sample, mixAmount, mixThreshold, iterations, weight, hueThreshold, hueFactor, chromaThreshold, chromaFactor, True)
-        # cache
-        if cache is not None:
-            cacheSet(cache)
-        end = time.time()
-        console.log(f"Process [green]completed[/green] in {end-start} seconds.")
-    else:
-        start = time.time()
-        # extract palette
-        palette = extractPalette(path, mode, dominant, extra, mix, tweak, sample, mixAmount, mixThreshold, iterations, weight, hueThreshold, hueFactor, chromaThreshold, chromaFactor, True)
-        # set wallpaper background
-        setWallpaper(path)
-        # export templates
-        exportAll(palette)
-        # cache
-        if cache is not None:
-            cacheSet(cache)
-        end = time.time()
-        console.log(f"Process [green]completed[/green] in {end-start} seconds.")
+    start = time.time()
+    options = {
+        "mode": mode, "dominant": dominant, "extraFlag": extra, "mixFlag": mix, "tweakFlag": tweak,
+        "numSample": sample, "mixAmount": mixAmount, "mixThreshold": mixThreshold, "iterations": iterations, "weight": weight,
+        "hueThreshold": hueThreshold, "hueFactor": hueFactor, "chromaThreshold": chromaThreshold, "chromaFactor": chromaFactor, "adjust": True,
+        "maxPixels": maxPixels, "sampling": sampling, "clusterEngine": clusterEngine,
+        "medoid": medoid, "dedup": dedup, "lut": lut, "stream": stream, "solver": solver,
+        "warmStart": warmStart,
+        "cachePixels": pixelCache,
+    }
+    checkOptions(options)
+    # run in the daemon if it is running
+    path = os.path.abspath(path)
+    if not forwardRequest("gen", {"path": path, "skip": skip, "options": options}):
+        runGen(path, skip, options)
+    # cache
+    if cache is not None:
+        cacheSet(cache)
+    end = time.time()
+    console.log(f"Process [green]completed[/green] in {end-start} seconds.")
 
 # preview command
 @app.command()
@@ -192,7 +295,194 @@ def preview(
 ):
     '''Previews current color palette.'''
     outdatedCheck()
-    previewPalette(image)
+    if image:
+        # the image is shown by the terminal running this command
+        previewImage()
+    if not forwardRequest("preview", dict()):
+        previewPalette(False)
+
+# batch command
+@app.command()
+def batch(
+    path: Annotated[
+        str,
+        typer.Argument(help="Path to directory of wallpaper images.")
+    ],
+    workers : Annotated[
+        int | None,
+        typer.Option(
+            help="Number of worker processes. Defaults to the number of CPUs.", rich_help_panel="Batch Settings"
+        ),
+    ] = None,
+    overwrite: Annotated[
+        bool,
+        typer.Option(
+            "--overwrite",
+            help="Overwrite palettes that are already cached.", rich_help_panel="Batch Settings"
+        ),
+    ] = False,
+    mode : Annotated[
+        str,
+        typer.Option(
+            help="Theme mode. light, dark, or auto.", rich_help_panel="Options"
+        ),
+    ] = "auto",
+    dominant : Annotated[
+        int,
+        typer.Option(
+            help="Number of dominant colors to pick from image for background. Must be >= 2.", rich_help_panel="Options"
+        ),
+    ] = 5,
+    clusterEngine : Annotated[
+        str,
+        typer.Option(
+            "--cluster-engine",
+            help="Clustering engine for dominant colors. kmeans, minibatch, or histogram.", rich_help_panel="Options"
+        ),
+    ] = "kmeans",
+    extra: Annotated[
+        bool,
+        typer.Option(
+            "--extra",
+            help="Toggles extra colors.", rich_help_panel="Variety"
+        ),
+    ] = False,
+    mix: Annotated[
+        bool,
+        typer.Option(
+            "--mix",
+            help="Toggles mixing palette colors with accent colors.", rich_help_panel="Variety"
+        ),
+    ] = False,
+    tweak: Annotated[
+        bool,
+        typer.Option(
+            "--tweak",
+            help="Toggles tweaking the hue and chroma of palette colors toward accent colors.", rich_help_panel="Variety"
+        ),
+    ] = False,
+    sample : Annotated[
+        int,
+        typer.Option(
+            help="Number of colors to sample from images to find accent colors.",
+            rich_help_panel="Options"
+        ),
+    ] = 10000,
+    medoid : Annotated[
+        str,
+        typer.Option(
+            help="Medoid method for accent colors. exact, chunked, approx, or weiszfeld.",
+            rich_help_panel="Options"
+        ),
+    ] = "chunked",
+    iterations : Annotated[
+        int,
+        typer.Option(
+            "--iterations", "-i",
+            help="Number of iterations for optimization to run.",
+            rich_help_panel="Options"
+        ),
+    ] = 10000,
+    weight : Annotated[
+        int,
+        typer.Option(
+            help="Uniqueness weight for optimization. Larger means more unique.",
+            rich_help_panel="Options"
+        ),
+    ] = 100,
+    solver : Annotated[
+        str,
+        typer.Option(
+            help="Solver for optimization. trust-constr or SLSQP.",
+            rich_help_panel="Options"
+        ),
+    ] = "trust-constr",
+    warmStart : Annotated[
+        bool,
+        typer.Option(
+            " /--no-warm-start",
+            help="Do not start optimization from stored solutions, so results do not depend on earlier runs.",
+            rich_help_panel="Options"
+        ),
+    ] = True,
+    maxPixels : Annotated[
+        int,
+        typer.Option(
+            "--max-pixels",
+            help="Maximum number of pixels to use from image. 0 uses every pixel.", rich_help_panel="Sampling Settings"
+        ),
+    ] = 0,
+    sampling : Annotated[
+        str,
+        typer.Option(
+            help="Sampling method when max pixels is set. stride, resize, or random.", rich_help_panel="Sampling Settings"
+        ),
+    ] = "stride",
+    dedup: Annotated[
+        bool,
+        typer.Option(
+            "--dedup",
+            help="Only process distinct colors weighted by their number of pixels.", rich_help_panel="Sampling Settings"
+        ),
+    ] = False,
+    lut : Annotated[
+        str,
+        typer.Option(
+            help="Lookup table for converting 8-bit colors to Oklab. none, channel, or full.", rich_help_panel="Sampling Settings"
+        ),
+    ] = "none",
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            help="Convert the decoded 8-bit image in strips so only it and the sampled or distinct colors are kept in memory. Needs --max-pixels or --dedup.", rich_help_panel="Sampling Settings"
+        ),
+    ] = False,
+):
+    '''
+    Generates and caches the color palettes of every image in a directory.
+    '''
+    outdatedCheck()
+    # precheck
+    if workers is not None and workers < 1:
+        raise typer.BadParameter("Number of workers must be >= 1.")
+    # functionality
+    start = time.time()
+    # mix and tweak settings use the gen defaults
+    options = {
+        "mode": mode, "dominant": dominant, "extraFlag": extra, "mixFlag": mix, "tweakFlag": tweak,
+        "numSample": sample, "mixAmount": 0.1, "mixThreshold": 0.16, "iterations": iterations, "weight": weight,
+        "hueThreshold": 10.0, "hueFactor": 1.0, "chromaThreshold": 3.0, "chromaFactor": 0.25, "adjust": True,
+        "maxPixels": maxPixels, "sampling": sampling, "clusterEngine": clusterEngine,
+        "medoid": medoid, "dedup": dedup, "lut": lut, "stream": stream, "solver": solver,
+        "warmStart": warmStart,
+        # each image is read once, so caching its pixels would only fill the cache
+        "cachePixels": False,
+    }
+    checkOptions(options)
+    from .batch import batchPalettes
+    batchPalettes(path, workers, overwrite, options)
+    end = time.time()
+    console.log(f"Process [green]completed[/green] in {end-start} seconds.")
+
+# daemon command
+@app.command()
+def daemon(
+    stop: Annotated[
+        bool,
+        typer.Option(
+            "--stop",
+            help="Stops the running daemon."
+        ),
+    ] = False,
+):
+    '''
+    Keeps PaletteSnap loaded so gen, cache load, and preview run faster.
+    '''
+    if stop:
+        stopDaemon()
+    else:
+        serveDaemon()
 
 ###
 # cache command
@@ -222,7 +512,8 @@ def cache_load(
     '''Loads the cached palette given a name.'''
     start = time.time()
     outdatedCheck()
-    loadCache(name)
+    if not forwardRequest("load", {"name": name}):
+        loadCache(name)
     end = time.time()
     console.log(f"Process [green]completed[/green] in {end-start} seconds.")
 
@@ -256,7 +547,7 @@ def cache_clear(
         typer.Option("--skip", help="Skips the confirmation prompt.")
     ] = False,
 ):
-    '''Clears all cached palettes.'''
+    '''Clears all cached palettes and the pixel cache of processed images.'''
     start = time.time()
     outdatedCheck()
     if not skip:
@@ -0,0 +1,65 @@
+###
+# Modules
+###
+
+# External Modules
+import numpy as np
+import numpy.typing as npt
+
+###
+# Engine Functions
+###
+# sklearn is imported by the engines so the CLI starts without it
+clusterEngines = ["kmeans", "minibatch", "histogram"]
+
+def kmeansCenters(labColors : npt.NDArray[any], numClusters : int, weights : npt.NDArray[any] | None = None) -> npt.NDArray[any]:
+    '''clusters every color with KMeans'''
+    from sklearn.cluster import KMeans
+    kmeans = KMeans(n_clusters=numClusters)
+    kmeans.fit(labColors, sample_weight=weights)
+    return kmeans.cluster_centers_
+
+def minibatchCenters(labColors : npt.NDArray[any], numClusters : int, weights : npt.NDArray[any] | None = None) -> npt.NDArray[any]:
+    '''clusters random batches of colors with MiniBatchKMeans'''
+    from sklearn.cluster import MiniBatchKMeans
+    # stop once the centers stop moving instead of running full passes over every color
+    kmeans = MiniBatchKMeans(n_clusters=numClusters, batch_size=4096, n_init=3, tol=1e-4)
+    kmeans.fit(labColors, sample_weight=weights)
+    return kmeans.cluster_centers_
+
+def histogramCenters(labColors : npt.NDArray[any], numClusters : int, weights : npt.NDArray[any] | None = None, bins : int = 32) -> npt.NDArray[any]:
+    '''quantizes colors into bins and clusters the bin centers weighted by their number of colors'''
+    # bin every channel over its range in the image
+    low = labColors.min(axis=0)
+    high = labColors.max(axis=0)
+    width = np.where(high > low, high - low, 1)
+    idx = np.floor((labColors - low) / width * bins).astype(np.int64)
+    idx = np.clip(idx, 0, bins - 1)
+    binIdx = (idx[:, 0] * bins + idx[:, 1]) * bins + idx[:, 2]
+    # bin centers are the mean color of each occupied bin
+    counts = np.bincount(binIdx, weights=weights, minlength=bins ** 3)
+    occupied = counts > 0
+    centers = np.empty((np.count_nonzero(occupied), 3))
+    for channel in range(3):
+        channelColors = labColors[:, channel] if weights is None else labColors[:, channel] * weights
+        sums = np.bincount(binIdx, weights=channelColors, minlength=bins ** 3)
+        centers[:, channel] = sums[occupied] / counts[occupied]
+    counts = counts[occupied]
+    # image has fewer distinct colors than clusters
+    if len(centers) <= numClusters:
+        return centers
+    return kmeansCenters(centers, numClusters, counts)
+
+###
+# Main Function
+###
+def findDominantColors(labColors : npt.NDArray[any], numClusters : int, engine : str, weights : npt.NDArray[any] | None = None) -> npt.NDArray[any]:
+    '''returns the cluster centers of the dominant colors using the given clustering engine'''
+    if engine == "kmeans":
+        return kmeansCenters(labColors, numClusters, weights)
+    elif engine == "minibatch":
+        return minibatchCenters(labColors, numClusters, weights)
+    elif engine == "histogram":
+        return histogramCenters(labColors, numClusters, weights)
+    else:
+        raise Exception(f"{engine} is not a valid clustering engine.")
@@ -1,16 +1,19 @@
 ###
 # Modules
 ###
+# colour-science is imported by the conversions that need it so precomputed colors load without it
 import numpy as np
-from colour import Oklab_to_XYZ, XYZ_to_sRGB, RGB_to_HSL, sRGB_to_XYZ, XYZ_to_Lab, XYZ_to_Oklab, Lab_to_XYZ, HSL_to_RGB
-from colour.models import JCh_to_Jab, Jab_to_JCh
 from PIL import ImageColor
 
+# Internal modules
+from .lut import rgbToOklab
+
 ###
 # Helper functions
 ###
 def okToNormalRgb(okColor):
     '''oklab color to rgb normalized'''
+    from colour import Oklab_to_XYZ, XYZ_to_sRGB
     xyzColor = Oklab_to_XYZ(list(okColor))
     rgbColor = XYZ_to_sRGB(xyzColor)
     red, green, blue = tuple(rgbColor)
@@ -33,6 +36,7 @@ def normalRgbToHex(rgbColor):
 
 def normalRgbToHsl(rgbColor):
     '''normalized rgb to hsl'''
+    from colour import RGB_to_HSL
     hslColor = RGB_to_HSL(rgbColor)
     hue, saturation, light = tuple(hslColor)
     hue = round(hue * 360)
@@ -43,6 +47,7 @@ def normalRgbToHsl(rgbColor):
 
 def normalRgbToCIE(rgbColor):
     '''normalized rgb to cielab'''
+    from colour import sRGB_to_XYZ, XYZ_to_Lab
     xyzColor = sRGB_to_XYZ(list(rgbColor))
     cieColor = XYZ_to_Lab(xyzColor)
     return cieColor
@@ -50,16 +55,13 @@ def normalRgbToCIE(rgbColor):
 # used for palette extraction
 def hexToLab(hexColor):
     '''converts hex to lab color'''
-    red, green, blue = ImageColor.getcolor(hexColor, "RGB")
-    red /= 255
-    green /= 255
-    blue /= 255
-    xyzColors = sRGB_to_XYZ([red, green, blue])
-    labColors = XYZ_to_Oklab(xyzColors)
-    return tuple(labColors)
+    rgbColor = ImageColor.getcolor(hexColor, "RGB")
+    labColors = rgbToOklab(rgbColor)
+    return tuple(labColors.tolist())
 
 # used for palette extraction
 def hslColor(hslColor):
+    from colour import HSL_to_RGB, sRGB_to_XYZ, XYZ_to_Oklab
     hue, saturation, light = hslColor
     hue /= 360
     saturation /= 100
@@ -72,41 +74,36 @@ def hslColor(hslColor):
 # used for optimization
 def cieColor(currColor):
     '''CIE Lab color as tuple to Color class'''
+    from colour import Lab_to_XYZ, XYZ_to_Oklab
     xyzColor = Lab_to_XYZ(list(currColor))
     okLab = tuple(XYZ_to_Oklab(xyzColor))
     okColor = Color(*okLab)
     return okColor
 
+# used for optimization
+def cieColors(cieArray):
+    '''array of CIE Lab colors to list of Color'''
+    from colour import Lab_to_XYZ, XYZ_to_Oklab
+    xyzColors = Lab_to_XYZ(np.asarray(cieArray, dtype=float))
+    return Color.fromArray(XYZ_to_Oklab(xyzColors))
+
 # used for palette extraction
 def rgbColor(rgbColor):
     '''rgb color to Color'''
-    red, green, blue = rgbColor
-    red /= 255
-    green /= 255
-    blue /= 255
-    xyzColor = sRGB_to_XYZ([red, green, blue])
-    labColor = tuple(XYZ_to_Oklab(xyzColor))
+    labColor = tuple(rgbToOklab(rgbColor).tolist())
     return Color(*labColor)
 
 # use for palette extraction
 def hexColor(hexColor):
     '''hex color to Color'''
-    red, green, blue = ImageColor.getcolor(hexColor, "RGB")
-    red /= 255
-    green /= 255
-    blue /= 255
-    xyzColors = sRGB_to_XYZ([red, green, blue])
-    labColors = tuple(XYZ_to_Oklab(xyzColors))
+    rgbColor = ImageColor.getcolor(hexColor, "RGB")
+    labColors = tuple(rgbToOklab(rgbColor).tolist())
     return Color(*labColors)
 
-# used for previewing
-def hexToRgb(hexColor):
-    red, green, blue = ImageColor.getcolor(hexColor, "RGB")
-    return (red, green, blue)
-
 # used for palette extraction
 def lchColor(lchColor):
     '''Oklch to Color'''
+    from colour.models import JCh_to_Jab
     labColor = tuple(JCh_to_Jab(list(lchColor)))
     return Color(*labColor)
 
@@ -114,6 +111,8 @@ def lchColor(lchColor):
 # Color class
 ###
 class Color():
+    # color spaces other than Oklab are computed on first access
+    __slots__ = ("L", "a", "b", "oklab", "_oklch", "_normalRgb", "_rgb", "_hex", "_hsl", "_cielab")
 
     def __init__(self, L, a, b):
         '''Initialize Oklab color'''
@@ -122,13 +121,98 @@ class Color():
         self.b = b
         # different color spaces
         self.oklab = (L, a, b)
-        self.oklch = tuple(Jab_to_JCh(list(self.oklab)))
-        self.normalRgb = okToNormalRgb(self.oklab)
-        self.rgb = normalRgbToRgb(self.normalRgb)
+        self._oklch = None
+        self._normalRgb = None
+        self._rgb = None
+        self._hex = None
+        self._hsl = None
+        self._cielab = None
+
+    @classmethod
+    def fromArray(cls, labColors):
+        '''converts an array of Oklab colors to a list of Color with one vectorised pass per color space'''
+        from colour import Oklab_to_XYZ, XYZ_to_sRGB, RGB_to_HSL, sRGB_to_XYZ, XYZ_to_Lab
+        from colour.models import Jab_to_JCh
+        labColors = np.asarray(labColors, dtype=float).reshape((-1, 3))
+        oklch = Jab_to_JCh(labColors)
+        # clamp color values to eliminate impossible colors
+        normalRgb = np.clip(XYZ_to_sRGB(Oklab_to_XYZ(labColors)), 0, 1)
+        rgb = np.round(normalRgb * 255).astype(int)
+        hsl = np.round(RGB_to_HSL(normalRgb) * [360, 100, 100]).astype(int)
+        cielab = XYZ_to_Lab(sRGB_to_XYZ(normalRgb))
+        colors = []
+        for i, (L, a, b) in enumerate(labColors.tolist()):
+            color = cls(L, a, b)
+            color._oklch = tuple(oklch[i])
+            color._normalRgb = tuple(normalRgb[i])
+            color._rgb = tuple(rgb[i].tolist())
+            color._hex = "#{:02x}{:02x}{:02x}".format(*color._rgb)
+            color._hsl = tuple(hsl[i].tolist())
+            color._cielab = cielab[i]
+            colors.append(color)
+        return colors
+
+    @classmethod
+    def fromDerived(cls, derived):
+        '''Color from a dict of precomputed color spaces'''
+        color = cls(*derived["oklab"])
+        color._normalRgb = tuple(derived["normalRgb"])
+        color._rgb = tuple(derived["rgb"])
+        color._hex = derived["hex"]
+        color._hsl = tuple(derived["hsl"])
+        return color
+
+    def toDerived(self):
+        '''dict of the color spaces used by templates'''
+        def toPlain(values):
+            # numpy scalars are stored as the matching python numbers
+            return [value.item() if hasattr(value, "item") else value for value in values]
+        return {"oklab": toPlain(self.oklab), "normalRgb": toPlain(self.normalRgb), "rgb": toPlain(self.rgb),
+                "hex": self.hex, "hsl": toPlain(self.hsl)}
+
+    @property
+    def oklch(self):
+        '''Oklch color'''
+        if self._oklch is None:
+            from colour.models import Jab_to_JCh
+            self._oklch = tuple(Jab_to_JCh(list(self.oklab)))
+        return self._oklch
+
+    @property
+    def normalRgb(self):
+        '''normalized rgb color'''
+        if self._normalRgb is None:
+            self._normalRgb = okToNormalRgb(self.oklab)
+        return self._normalRgb
+
+    @property
+    def rgb(self):
+        '''rgb color'''
+        if self._rgb is None:
+            self._rgb = normalRgbToRgb(self.normalRgb)
+        return self._rgb
+
+    @property
+    def hex(self):
+        '''hex color'''
         # we use rgb since rgb eliminates impossible colors
-        self.hex = normalRgbToHex(self.normalRgb)
-        self.hsl = normalRgbToHsl(self.normalRgb)
-        self.cielab = normalRgbToCIE(self.normalRgb)
+        if self._hex is None:
+            self._hex = normalRgbToHex(self.normalRgb)
+        return self._hex
+
+    @property
+    def hsl(self):
+        '''hsl color'''
+        if self._hsl is None:
+            self._hsl = normalRgbToHsl(self.normalRgb)
+        return self._hsl
+
+    @property
+    def cielab(self):
+        '''CIE Lab color'''
+        if self._cielab is None:
+            self._cielab = normalRgbToCIE(self.normalRgb)
+        return self._cielab
 
     def __repr__(self):
         '''string representation'''
@@ -5,26 +5,51 @@
 # External modules
 import numpy as np
 import math
-from scipy.optimize import minimize, Bounds
+import os
+import json
+import time
 import warnings
 
 # Internal modules
+from . import setup
 from .console import console
-from .colorClass import Color, cieColor
+from .colorClass import Color, cieColors
 
 
 ###
 # Helper Functions
 ###
 
+# scipy is imported by the solvers so the CLI starts without it
+optimizeSolvers = ["trust-constr", "SLSQP"]
+
+def findPairs(n : int) -> tuple[np.ndarray, np.ndarray]:
+    '''returns the indices i < j of every pair of values'''
+    return np.triu_indices(n, 1)
+
 # Penalty function
 def penalty_function(a, original, weight):
     # Distances
     deviation_penalty = math.sqrt(np.sum((a - original) ** 2))
     # Uniqueness cost
-    uniqueness_penalty = np.sum([max(0, 0.1 - abs(a[i] - a[j]))**2 for i in range(len(a)) for j in range(i + 1, len(a))])
+    i, j = findPairs(len(a))
+    uniqueness_penalty = np.sum(np.maximum(0, 0.1 - np.abs(a[i] - a[j])) ** 2)
     return deviation_penalty + uniqueness_penalty * weight  # Higher means more uniqueness
 
+def penalty_gradient(a, original, weight):
+    '''gradient of the penalty function'''
+    # deviation has no gradient at the original values, so use 0 there
+    deviation = np.asarray(a - original, dtype=float)
+    norm = math.sqrt(np.sum(deviation ** 2))
+    gradient = deviation / norm if norm > 0 else np.zeros(len(a))
+    # every pair closer than 0.1 pushes its values apart
+    i, j = findPairs(len(a))
+    diff = a[i] - a[j]
+    pairGradient = -2 * np.maximum(0, 0.1 - np.abs(diff)) * np.sign(diff) * weight
+    gradient += np.bincount(i, weights=pairGradient, minlength=len(a))
+    gradient -= np.bincount(j, weights=pairGradient, minlength=len(a))
+    return gradient
+
 def no_penalty_function(a, original):
     return 0
 
@@ -34,14 +59,85 @@ def constraint_1(x):
         return np.abs(a - x) - 33  # Ensure abs(a_i - x) >= 33
     return inner_constraint
 
+def constraint_1_jacobian(x):
+    def inner_jacobian(a):
+        return np.diag(np.sign(a - x))
+    return inner_jacobian
+
 def constraint_2(a):
     # Each pair of a_i must differ by at most 20
-    n = len(a)
-    constraints = []
-    for i in range(n):
-        for j in range(i + 1, n):
-            constraints.append(20 - abs(a[i] - a[j]))
-    return np.array(constraints)
+    i, j = findPairs(len(a))
+    return 20 - np.abs(a[i] - a[j])
+
+def constraint_2_jacobian(a):
+    '''jacobian of constraint_2 with one row per pair'''
+    i, j = findPairs(len(a))
+    sign = np.sign(a[i] - a[j])
+    rows = np.arange(len(i))
+    jacobian = np.zeros((len(i), len(a)))
+    jacobian[rows, i] = -sign
+    jacobian[rows, j] = sign
+    return jacobian
+
+def runSolver(lightList, original_values, weight, bounds, cons, iterations : int, solver : str):
+    '''minimizes the penalty with the given solver and logs its time and objective'''
+    from scipy.optimize import minimize
+    if solver not in optimizeSolvers:
+        raise Exception(f"{solver} is not a valid solver.")
+    start = time.perf_counter()
+    options = {'disp': False, 'maxiter': iterations}
+    result = minimize(penalty_function, lightList, args=(original_values, weight), jac=penalty_gradient, bounds=bounds,
+                      constraints=cons, method=solver, options=options)
+    end = time.perf_counter()
+    console.log(f"{solver} ran {result.nit} iterations in {end-start:.2f} seconds with objective {result.fun:.4f}.")
+    return result
+
+# New colors
+def findNewAccents(lightDict : dict[str, Color], optimized_values) -> dict[str, Color]:
+    '''returns the accent colors with their lightness replaced by the optimized values'''
+    cieArray = [(light, lightDict[key].cielab[1], lightDict[key].cielab[2]) for key, light in zip(lightDict, optimized_values)]
+    return dict(zip(lightDict.keys(), cieColors(cieArray)))
+
+# Warm start
+# converged solutions are stored by background lightness bucket, foreground order, accent names, and weight
+solutionPath = os.path.join(setup.cache, "solutions.json")
+bucketSize = 5
+
+def findBucket(bgLight : int | float) -> int:
+    '''returns the lightness bucket of the background'''
+    return int(bgLight // bucketSize)
+
+def loadSolutions() -> list[dict]:
+    '''returns the stored solutions'''
+    try:
+        with open(solutionPath, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+def saveSolution(bgLight : int | float, fgAbove : bool, keys : list[str], weight : int, method : str, optimized_values) -> None:
+    '''stores the solution, replacing the one with the same bucket, foreground order, accents, and weight'''
+    solution = {"bucket": findBucket(bgLight), "bgLight": float(bgLight), "fgAbove": fgAbove, "keys": keys, "weight": weight,
+                "method": method, "values": [float(value) for value in optimized_values]}
+    solutions = [old for old in loadSolutions()
+                 if (old["bucket"], old["fgAbove"], old["keys"], old["weight"]) != (solution["bucket"], fgAbove, keys, weight)]
+    solutions.append(solution)
+    tempPath = f"{solutionPath}.{os.getpid()}.tmp"
+    with open(tempPath, "w") as file:
+        json.dump(solutions, file)
+    os.replace(tempPath, solutionPath)
+
+def findWarmStart(bgLight : int | float, fgAbove : bool, keys : list[str], weight : int) -> dict | None:
+    '''returns the stored solution for the same accents with the closest background lightness and then weight'''
+    # only nearby backgrounds with the same foreground order are used since constraint 1 allows accents on
+    # either side of the background and a distant start decides the side
+    bucket = findBucket(bgLight)
+    solutions = [solution for solution in loadSolutions()
+                 if solution["keys"] == keys and solution["fgAbove"] == fgAbove and abs(solution["bucket"] - bucket) <= 1]
+    if len(solutions) == 0:
+        return None
+    return min(solutions, key=lambda solution: (abs(solution["bucket"] - bucket), abs(solution["weight"] - weight),
+                                                abs(solution["bgLight"] - bgLight)))
 
 ###
 # Primary Function
@@ -51,70 +147,69 @@ def constraint_2(a):
 warnings.filterwarnings("ignore", message="delta_grad == 0.0. Check if the approximated function is linear.")
 warnings.filterwarnings("ignore", message="Singular Jacobian matrix. Using SVD decomposition to perform the factorizations.")
 
-def performOptimal(bgLight : int | float, palette : dict[str, Color], iterations : int, weight : int) -> dict[str, Color]:
+def performOptimal(bgLight : int | float, palette : dict[str, Color], iterations : int, weight : int,
+                   solver : str = "trust-constr", warmStart : bool = True) -> dict[str, Color]:
     '''performs optimization on the lightness of the accent colors'''
+    from scipy.optimize import Bounds
     # set up initial values
     lightDict = {key: value for key, value in palette.items() if "bg" not in key}
-    lightList = [lightDict[key].cielab[0] for key in lightDict]
+    lightList = np.array([lightDict[key].cielab[0] for key in lightDict], dtype=float)
     original_values = lightList.copy()
     length = len(original_values)
-    bounds = Bounds([0] * length, [100] * length)  # bounds between 0 and 100
-    # Constraints
-    cons = [{'type': 'ineq', 'fun': constraint_1(bgLight)},
-            {'type': 'ineq', 'fun': constraint_2}]
-    # extract and print result
-    console.log(f"Optimizing palette colors for good contrast with {iterations} as maximum number of iterations.")
-    result = minimize(penalty_function, lightList, args=(original_values, weight), bounds=bounds, constraints=cons, method='trust-constr', options={'disp': False, 'maxiter': iterations})
+    keys = list(lightDict.keys())
+    fgLight = palette["fg"].cielab[0]
+    fgAbove = bool(fgLight > bgLight)
+    # start from the closest stored solution
+    method = "primary"
+    stored = findWarmStart(bgLight, fgAbove, keys, weight) if warmStart else None
+    if stored is not None:
+        console.log(f"Warm starting from solution for background lightness {stored['bgLight']:.1f}.")
+        lightList = np.array(stored["values"], dtype=float)
+        # skip the primary method if only the backup converged for the same background
+        if stored["method"] == "backup" and stored["bucket"] == findBucket(bgLight) and stored["weight"] == weight:
+            method = "backup"
+    if method == "primary":
+        bounds = Bounds([0] * length, [100] * length)  # bounds between 0 and 100
+        # Constraints
+        cons = [{'type': 'ineq', 'fun': constraint_1(bgLight), 'jac': constraint_1_jacobian(bgLight)},
+                {'type': 'ineq', 'fun': constraint_2, 'jac': constraint_2_jacobian}]
+        # extract and print result
+        console.log(f"Optimizing palette colors for good contrast with {iterations} as maximum number of iterations.")
+        result = runSolver(np.clip(lightList, 0, 100), original_values, weight, bounds, cons, iterations, solver)
+        if result.success:
+            console.log(f"Optimization [green]succeed[/green].")
+            optimized_values = result.x
+            saveSolution(bgLight, fgAbove, keys, weight, "primary", optimized_values)
+            # return new accent colors
+            return findNewAccents(lightDict, optimized_values)
+        console.log("Current optimization method [red]failed[/red].")
+        console.log("Trying new optimization method.")
+    # Redo bounds and constraints for the backup method
+    if fgAbove:
+        lightThreshold = bgLight + 33
+        newBounds = Bounds([lightThreshold] * length, [100] * length)
+    else:
+        lightThreshold = bgLight - 33
+        newBounds = Bounds([0] * length, [lightThreshold] * length)
+    newCons = [{'type': 'ineq', 'fun': constraint_2, 'jac': constraint_2_jacobian}]
+    # Try it again
+    x0 = np.clip(lightList, newBounds.lb, newBounds.ub)
+    result = runSolver(x0, original_values, weight, newBounds, newCons, iterations, solver)
     if result.success:
-        console.log(f"Optimization [green]succeed[/green].")
+        console.log("Backup optimization [green]succeed[/green].")
         optimized_values = result.x
+        saveSolution(bgLight, fgAbove, keys, weight, "backup", optimized_values)
         # return new accent colors
-        newLightDict = dict(zip(lightDict.keys(), optimized_values))
-        newAccents = dict()
-        for key in lightDict:
-            newColor = (newLightDict[key], lightDict[key].cielab[1], lightDict[key].cielab[2])
-            newAccents[key] = cieColor(newColor)
-        return newAccents
+        return findNewAccents(lightDict, optimized_values)
+    console.log("Backup optimization [red]failed[/red].")
+    console.log("Manual optimization process started.")
+    console.log("Palette results from manual operation will not be as good as automatic optimization.")
+    console.log("Please adjust your settings to prevent manual optimization.")
+    console.log("Defining the [b]mode[/b] of your image usually prevents manual optimization.")
+    if fgAbove:
+        lightThreshold = bgLight + 33
     else:
-        console.log("Current optimization method [red]failed[/red].")
-        console.log("Trying new optimization method.")
-        # Redo bounds and constraints
-        fgLight = palette["fg"].cielab[0]
-        if fgLight > bgLight:
-            lightThreshold = bgLight + 33
-            newBounds = Bounds([lightThreshold] * length, [100] * length)
-        else:
-            lightThreshold = bgLight - 33
-            newBounds = Bounds([0] * length, [lightThreshold] * length)
-        newCons = [{'type': 'ineq', 'fun': constraint_2}]
-        # Try it again
-        result = minimize(penalty_function, lightList, args=(original_values, weight), bounds=newBounds, constraints=newCons, method='trust-constr', options={'disp': False, 'maxiter': iterations})
-        if result.success:
-            console.log("Backup optimization [green]succeed[/green].")
-            optimized_values = result.x
-            # return new accent colors
-            newLightDict = dict(zip(lightDict.keys(), optimized_values))
-            newAccents = dict()
-            for key in lightDict:
-                newColor = (newLightDict[key], lightDict[key].cielab[1], lightDict[key].cielab[2])
-                newAccents[key] = cieColor(newColor)
-            return newAccents
-        else:
-            console.log("Backup optimization [red]failed[/red].")
-            console.log("Manual optimization process started.")
-            console.log("Palette results from manual operation will not be as good as automatic optimization.")
-            console.log("Please adjust your settings to prevent manual optimization.")
-            console.log("Defining the [b]mode[/b] of your image usually prevents manual optimization.")
-            fgLight = palette["fg"].cielab[0]
-            if fgLight > bgLight:
-                lightThreshold = bgLight + 33
-            else:
-                lightThreshold = bgLight - 33
-            optimized_values = [lightThreshold] * length
-            # return new accent colors
-            newLightDict = dict(zip(lightDict.keys(), optimized_values))
-            newAccents = dict()
-            for key in lightDict:
-                newColor = (newLightDict[key], lightDict[key].cielab[1], lightDict[key].cielab[2])
-                newAccents[key] = cieColor(newColor)
-            return newAccents
\ No newline at end of file
+        lightThreshold = bgLight - 33
+    optimized_values = [lightThreshold] * length
+    # return new accent colors
+    return findNewAccents(lightDict, optimized_values)
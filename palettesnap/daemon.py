@@ -0,0 +1,184 @@
+###
+# Modules
+###
+
+# External modules
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+import traceback
+from contextlib import redirect_stdout
+from typer import Exit
+
+# Internal modules
+from . import setup
+from .console import console
+
+###
+# Daemon settings
+###
+socketPath = os.path.join(setup.cache, "palsnap.sock")
+
+###
+# Helper functions
+###
+class SocketWriter(io.TextIOBase):
+    '''file-like object that sends written text to the client'''
+
+    def __init__(self, conn : socket.socket, isTerminal : bool):
+        '''Initialize writer for a client connection'''
+        self.conn = conn
+        self.isTerminal = isTerminal
+
+    def write(self, text : str) -> int:
+        '''sends text to the client'''
+        sendMessage(self.conn, {"output": text})
+        return len(text)
+
+    def isatty(self) -> bool:
+        '''lets rich style output for the client terminal'''
+        return self.isTerminal
+
+def sendMessage(conn : socket.socket, message : dict) -> None:
+    '''sends a JSON message on its own line'''
+    conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+def connectDaemon() -> socket.socket | None:
+    '''returns a connection to the running daemon or None if no daemon is running'''
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socketPath):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socketPath)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # stale socket of a daemon that did not shut down cleanly
+        conn.close()
+        return None
+    return conn
+
+def runRequest(command : str, args : dict) -> None:
+    '''runs a forwarded command inside the daemon'''
+    if command == "gen":
+        from .cli import runGen
+        runGen(args["path"], args["skip"], args["options"])
+    elif command == "load":
+        from .cache import loadCache
+        loadCache(args["name"])
+    elif command == "preview":
+        from .preview import previewColors
+        previewColors()
+    else:
+        raise Exception(f"{command} is not a daemon command.")
+
+def handleConnection(conn : socket.socket) -> bool:
+    '''handles one client request and returns False if the daemon should stop'''
+    line = conn.makefile("r", encoding="utf-8").readline()
+    if line == "":
+        # client closed without a request, like the already running check
+        return True
+    request = json.loads(line)
+    command = request["command"]
+    if command == "stop":
+        console.log("Stopping PaletteSnap daemon.")
+        sendMessage(conn, {"status": 0})
+        return False
+    console.log(f"Running forwarded {command} command.")
+    # send all output to the client while the request runs
+    writer = SocketWriter(conn, request["terminal"])
+    serverFile = console.file
+    console.file = writer
+    console.width = request["width"]
+    status = 0
+    try:
+        with redirect_stdout(writer):
+            runRequest(command, request["args"])
+    except Exit as error:
+        status = error.exit_code
+    except Exception:
+        writer.write(traceback.format_exc())
+        status = 1
+    finally:
+        console.file = serverFile
+        console.width = None
+    sendMessage(conn, {"status": status})
+    return True
+
+###
+# Main functions
+###
+def forwardRequest(command : str, args : dict) -> bool:
+    '''runs the command in the running daemon and returns False if no daemon is running'''
+    conn = connectDaemon()
+    if conn is None:
+        return False
+    status = 0
+    with conn:
+        request = {
+            "command": command,
+            "args": args,
+            "width": shutil.get_terminal_size().columns,
+            "terminal": sys.stdout.isatty(),
+        }
+        sendMessage(conn, request)
+        for line in conn.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+            if "output" in message:
+                sys.stdout.write(message["output"])
+                sys.stdout.flush()
+            else:
+                status = message["status"]
+    if status != 0:
+        raise Exit(status)
+    return True
+
+def stopDaemon() -> None:
+    '''stops the running daemon'''
+    if forwardRequest("stop", dict()):
+        console.log("PaletteSnap daemon [green]stopped[/green].")
+    else:
+        console.log("No PaletteSnap daemon is running.")
+
+def serveDaemon() -> None:
+    '''keeps PaletteSnap loaded and serves forwarded commands over a Unix domain socket'''
+    if not hasattr(socket, "AF_UNIX"):
+        console.log("Unix domain sockets are not supported on this OS. [red]Failed[/red] to start daemon.")
+        raise Exit(1)
+    conn = connectDaemon()
+    if conn is not None:
+        conn.close()
+        console.log("A PaletteSnap daemon is already running.")
+        raise Exit(1)
+    if os.path.exists(socketPath):
+        os.remove(socketPath)
+    # import the heavy modules and read the config once
+    console.log("Loading PaletteSnap.")
+    from .PaletteSnap import parseConfig
+    from .lut import loadChannelTable
+    import sklearn.cluster, sklearn.metrics, kmedoids
+    parseConfig()
+    loadChannelTable()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socketPath)
+    os.chmod(socketPath, 0o600)
+    server.listen()
+    console.log(f"PaletteSnap daemon listening on [u]{socketPath}[/u].")
+    try:
+        running = True
+        while running:
+            conn, address = server.accept()
+            with conn:
+                try:
+                    running = handleConnection(conn)
+                except (BrokenPipeError, ConnectionResetError):
+                    console.log("Client disconnected before the command finished.")
+                except (ValueError, KeyError, TypeError):
+                    # one bad connection must not stop the daemon
+                    console.log("Ignored malformed request.")
+    except KeyboardInterrupt:
+        console.log("Stopping PaletteSnap daemon.")
+    finally:
+        server.close()
+        os.remove(socketPath)
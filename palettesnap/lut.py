@@ -0,0 +1,93 @@
+###
+# Modules
+###
+
+# External Modules
+import os
+import numpy as np
+import numpy.typing as npt
+
+# Internal Modules
+from . import setup
+from .sampling import packColors, unpackColors, to8bit
+
+###
+# Lookup tables
+###
+# none converts with colour-science directly
+# channel linearizes each 8-bit channel with a 256 entry table
+# full gathers from a precomputed table of every 24-bit color
+lutModes = ["none", "channel", "full"]
+lutPath = os.path.join(setup.cache, "oklab_lut.npy")
+
+# channel table and full table, computed on first use so colour-science is only imported when needed
+channelTable = None
+rgbToXyzMatrix = None
+fullTable = None
+
+###
+# Helper Functions
+###
+def loadChannelTable() -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    '''returns the linear value of every 8-bit sRGB channel value and the sRGB to XYZ matrix'''
+    global channelTable, rgbToXyzMatrix
+    if channelTable is None:
+        from colour import cctf_decoding
+        from colour.models import RGB_COLOURSPACE_sRGB
+        channelTable = cctf_decoding(np.arange(256) / 255, function="sRGB")
+        # sRGB and XYZ share the D65 whitepoint, so no chromatic adaptation is needed
+        rgbToXyzMatrix = RGB_COLOURSPACE_sRGB.matrix_RGB_to_XYZ
+    return channelTable, rgbToXyzMatrix
+
+def channelToOklab(rgb8 : npt.NDArray[np.uint8]) -> npt.NDArray[np.float64]:
+    '''converts 8-bit sRGB colors to Oklab with the per-channel linearization table'''
+    from colour import XYZ_to_Oklab
+    table, matrix = loadChannelTable()
+    linearColors = table[rgb8]
+    xyzColors = linearColors @ matrix.T
+    return XYZ_to_Oklab(xyzColors)
+
+def buildFullTable() -> None:
+    '''computes the Oklab value of every 24-bit color and saves it in the cache dir'''
+    tempPath = f"{lutPath}.{os.getpid()}.tmp"
+    table = np.lib.format.open_memmap(tempPath, mode="w+", dtype=np.float32, shape=(2 ** 24, 3))
+    chunkSize = 2 ** 20
+    for start in range(0, 2 ** 24, chunkSize):
+        packed = np.arange(start, start + chunkSize, dtype=np.uint32)
+        table[start:start + chunkSize] = channelToOklab(unpackColors(packed))
+    table.flush()
+    del table
+    # other processes only ever see a complete table
+    os.replace(tempPath, lutPath)
+
+def loadFullTable() -> npt.NDArray[np.float32]:
+    '''returns the memory-mapped full table, building it the first time'''
+    global fullTable
+    if fullTable is None:
+        if not os.path.isfile(lutPath):
+            buildFullTable()
+        fullTable = np.load(lutPath, mmap_mode="r")
+    return fullTable
+
+###
+# Main Function
+###
+def rgbToOklab(rgb8 : npt.NDArray[any], mode : str = "channel") -> npt.NDArray[any]:
+    '''converts 8-bit sRGB colors of any shape to Oklab using the given lookup table'''
+    rgb8 = np.asarray(rgb8, dtype=np.uint32)
+    if mode == "full":
+        return loadFullTable()[packColors(rgb8)]
+    elif mode == "channel":
+        return channelToOklab(rgb8)
+    else:
+        raise Exception(f"{mode} is not a valid lookup table.")
+
+def convertColors(rgbColors : npt.NDArray[any], mode : str) -> npt.NDArray[any]:
+    '''converts sRGB colors in [0, 1] or 8-bit sRGB colors to Oklab with the given lookup table'''
+    if mode == "none":
+        from colour import sRGB_to_XYZ, XYZ_to_Oklab
+        if rgbColors.dtype == np.uint8:
+            rgbColors = rgbColors / 255
+        return XYZ_to_Oklab(sRGB_to_XYZ(rgbColors))
+    # lookup tables work on 8-bit colors
+    return rgbToOklab(to8bit(rgbColors), mode)
@@ -0,0 +1,78 @@
+###
+# Modules
+###
+
+# External Modules
+import numpy as np
+import numpy.typing as npt
+
+###
+# Medoid Functions
+###
+# kmedoids and sklearn are imported by the methods so the CLI starts without them
+medoidMethods = ["exact", "chunked", "approx", "weiszfeld"]
+
+def exactMedoid(colors : npt.NDArray[any]) -> int:
+    '''runs FasterPAM on the full distance matrix'''
+    from kmedoids import fasterpam
+    from sklearn.metrics import pairwise_distances
+    distMatrix = pairwise_distances(colors, colors)
+    dominantIdx = fasterpam(distMatrix, 1)
+    return int(dominantIdx.medoids[0])
+
+def sumDistances(colors : npt.NDArray[any], refColors : npt.NDArray[any], weights : npt.NDArray[any] | None = None) -> npt.NDArray[any]:
+    '''returns the (weighted) sum of distances of every color to the reference colors, one block of rows at a time'''
+    from sklearn.metrics import pairwise_distances_chunked
+    def reduceChunk(distChunk, start):
+        return distChunk.sum(axis=1) if weights is None else distChunk @ weights
+    chunks = pairwise_distances_chunked(colors, refColors, reduce_func=reduceChunk, working_memory=64)
+    return np.concatenate(list(chunks))
+
+def chunkedMedoid(colors : npt.NDArray[any], weights : npt.NDArray[any] | None = None) -> int:
+    '''finds the exact medoid without materializing the full distance matrix'''
+    return int(np.argmin(sumDistances(colors, colors, weights)))
+
+def approxMedoid(colors : npt.NDArray[any], weights : npt.NDArray[any] | None = None, numRefs : int = 1000, seed : int = 0) -> int:
+    '''finds the medoid using the distances to a random subset of the colors'''
+    if len(colors) <= numRefs:
+        return chunkedMedoid(colors, weights)
+    rng = np.random.default_rng(seed)
+    probs = None if weights is None else weights / weights.sum()
+    refIdx = rng.choice(len(colors), size=numRefs, replace=False, p=probs)
+    return int(np.argmin(sumDistances(colors, colors[refIdx])))
+
+def weiszfeldMedoid(colors : npt.NDArray[any], weights : npt.NDArray[any] | None = None, iterations : int = 100, tol : float = 1e-7) -> int:
+    '''finds the color closest to the geometric median computed with Weiszfeld's algorithm'''
+    colors64 = np.asarray(colors, dtype=np.float64)
+    weights = np.ones(len(colors64)) if weights is None else np.asarray(weights, dtype=np.float64)
+    median = np.average(colors64, axis=0, weights=weights)
+    for _ in range(iterations):
+        dist = np.linalg.norm(colors64 - median, axis=1)
+        # avoid dividing by zero when the median lands on a color
+        dist = np.maximum(dist, 1e-12)
+        coef = weights / dist
+        newMedian = coef @ colors64 / coef.sum()
+        if np.linalg.norm(newMedian - median) < tol:
+            median = newMedian
+            break
+        median = newMedian
+    return int(np.argmin(np.linalg.norm(colors64 - median, axis=1)))
+
+###
+# Main Function
+###
+def findMedoid(colors : npt.NDArray[any], method : str, weights : npt.NDArray[any] | None = None) -> int:
+    '''returns the index of the medoid of the colors using the given method'''
+    if method == "exact":
+        # FasterPAM does not take weights, chunked gives the same exact medoid
+        if weights is not None:
+            return chunkedMedoid(colors, weights)
+        return exactMedoid(colors)
+    elif method == "chunked":
+        return chunkedMedoid(colors, weights)
+    elif method == "approx":
+        return approxMedoid(colors, weights)
+    elif method == "weiszfeld":
+        return weiszfeldMedoid(colors, weights)
+    else:
+        raise Exception(f"{method} is not a valid medoid method.")
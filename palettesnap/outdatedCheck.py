@@ -3,46 +3,89 @@
 ###
 
 # External modules
-import subprocess
-import requests
+import atexit
+import json
+import os
+import threading
+import time
+from importlib import metadata
 
 # Internal modules
+from . import setup
 from .console import console
 
 ###
-# Main functions
+# Version cache settings
+###
+# latest PyPI version is cached so commands do not wait on the network
+versionPath = os.path.join(setup.cache, "version.json")
+versionTTL = 24 * 60 * 60
+# failed checks are retried sooner so offline commands do not wait on every exit
+retryTTL = 60 * 60
+requestTimeout = 2
+
+###
+# Helper functions
 ###
 def findCurrVersion() -> str | None:
     '''returns user-installed version'''
-    proc = subprocess.run(['pip', 'show', 'palettesnap'], capture_output=True)
-    if proc.returncode != 0:
-        # pip failed to find palettesnap
+    try:
+        return metadata.version("palettesnap")
+    except metadata.PackageNotFoundError:
         return None
-    res = proc.stdout.decode("utf-8")
-    version = res.splitlines()[1]
-    version = version.split(" ")[1]
-    return version
 
 def findLatestVersion() -> str | None:
     '''returns latest version on PyPi'''
+    import requests
     url = "https://pypi.org/pypi/palettesnap/json"
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=requestTimeout)
         response.raise_for_status()
         version = response.json()["info"]["version"]
         return version
-    except requests.exceptions.HTTPError:
+    except (requests.exceptions.RequestException, ValueError, KeyError):
+        return None
+
+def readVersionCache() -> dict | None:
+    '''returns the cached latest version, or None if no check succeeded, and when it was checked'''
+    try:
+        with open(versionPath, "r") as file:
+            cached = json.load(file)
+        latest = None if cached["latest"] is None else str(cached["latest"])
+        return {"latest": latest, "checked": float(cached["checked"])}
+    except (OSError, ValueError, KeyError, TypeError):
         return None
 
+def refreshVersionCache(cached : dict | None) -> None:
+    '''fetches the latest version and caches it, keeping the cached version if the check failed'''
+    latest = findLatestVersion()
+    if latest is None and cached is not None:
+        latest = cached["latest"]
+    tempPath = f"{versionPath}.{os.getpid()}.tmp"
+    with open(tempPath, "w") as file:
+        json.dump({"latest": latest, "checked": time.time()}, file)
+    os.replace(tempPath, versionPath)
+
+###
+# Main functions
+###
 def outdatedCheck() -> None:
     '''check if user-installed version is outdated or not'''
     current = findCurrVersion()
-    latest = findLatestVersion()
-    if latest is None or current is None:
+    cached = readVersionCache()
+    ttl = retryTTL if cached is None or cached["latest"] is None else versionTTL
+    if cached is None or time.time() - cached["checked"] > ttl:
+        # refresh in the background for the next command, giving it until the timeout to finish on exit
+        thread = threading.Thread(target=refreshVersionCache, args=(cached,), daemon=True)
+        thread.start()
+        atexit.register(thread.join, requestTimeout)
+    if cached is None:
+        console.log("Checking for palettesnap updates in the background.")
+    elif current is None or cached["latest"] is None:
         console.log("Failed to check for palettesnap updates.")
-    elif current != latest:
+    elif current != cached["latest"]:
         console.log("Your version of palettesnap is [red]outdated[/red].")
         console.log(f"Current version: {current}.")
-        console.log(f"Latest version: {latest}.")
+        console.log(f"Latest version: {cached['latest']}.")
     else:
         console.log("Your version of palettesnap is [green]up-to-date[/green].")
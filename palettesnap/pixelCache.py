@@ -0,0 +1,115 @@
+###
+# Modules
+###
+
+# External Modules
+import hashlib
+import os
+import numpy as np
+import numpy.typing as npt
+
+# Internal Modules
+from . import setup
+
+###
+# Pixel cache settings
+###
+# Oklab arrays of processed images are stored here as float32 .npy files
+# deduplicated arrays also store the number of pixels of each color in a .counts.npy file
+pixelDir = os.path.join(setup.cache, "pixels")
+# least recently used arrays are evicted once the directory is larger than this many MiB
+sizeVariable = "PALSNAP_PIXEL_CACHE_SIZE"
+defaultPixelCacheSize = 2048
+
+###
+# Helper Functions
+###
+def findKey(imgPath : str, *params) -> str:
+    '''returns the cache key of an image given its content, mtime and processing parameters'''
+    hasher = hashlib.sha256()
+    with open(imgPath, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 ** 2), b""):
+            hasher.update(chunk)
+    hasher.update(str(os.path.getmtime(imgPath)).encode())
+    hasher.update(repr(params).encode())
+    return hasher.hexdigest()
+
+def findPaths(key : str) -> tuple[str, str]:
+    '''returns the paths of the Oklab array and of the color counts for key'''
+    colorPath = os.path.join(pixelDir, f"{key}.npy")
+    countPath = os.path.join(pixelDir, f"{key}.counts.npy")
+    return colorPath, countPath
+
+def saveArray(path : str, array : npt.NDArray[any]) -> None:
+    '''saves an array through a temporary file so other processes never read a partial array'''
+    tempPath = f"{path}.{os.getpid()}.tmp"
+    with open(tempPath, "wb") as file:
+        np.save(file, array)
+    os.replace(tempPath, path)
+
+def findMaxSize() -> int:
+    '''returns the largest size of the pixel cache in bytes'''
+    value = os.getenv(sizeVariable, str(defaultPixelCacheSize))
+    if not value.isdigit():
+        raise Exception(f"{sizeVariable} must be a whole number of MiB")
+    return int(value) * 1024 ** 2
+
+def evictPixels(keepKey : str) -> None:
+    '''removes the least recently used entries until the cache fits in the largest size'''
+    maxPixelCacheSize = findMaxSize()
+    # an entry is the Oklab array of a key and its optional color counts
+    entries = dict()
+    for entry in os.scandir(pixelDir):
+        if not entry.name.endswith(".npy"):
+            continue
+        key = entry.name.split(".")[0]
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            # evicted by another process
+            continue
+        size, mtime = entries.get(key, (0, 0))
+        entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+    totalSize = sum(size for size, mtime in entries.values())
+    for key in sorted(entries, key=lambda key: entries[key][1]):
+        if totalSize <= maxPixelCacheSize:
+            break
+        if key == keepKey:
+            continue
+        totalSize -= entries[key][0]
+        for path in findPaths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # already evicted by another process or never had counts
+                pass
+
+###
+# Main Functions
+###
+def loadPixels(key : str, weighted : bool) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int64] | None] | None:
+    '''returns the memory-mapped Oklab array and color counts for key or None if they are not cached'''
+    colorPath, countPath = findPaths(key)
+    paths = [colorPath, countPath] if weighted else [colorPath]
+    if not all(os.path.isfile(path) for path in paths):
+        return None
+    try:
+        # mark as recently used
+        for path in paths:
+            os.utime(path)
+        labColors = np.load(colorPath, mmap_mode="r")
+        weights = np.load(countPath, mmap_mode="r") if weighted else None
+    except FileNotFoundError:
+        # evicted by another process
+        return None
+    return labColors, weights
+
+def savePixels(key : str, labColors : npt.NDArray[any], weights : npt.NDArray[any] | None = None) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int64] | None]:
+    '''caches the Oklab array and color counts for key and returns them memory-mapped'''
+    os.makedirs(pixelDir, exist_ok=True)
+    colorPath, countPath = findPaths(key)
+    if weights is not None:
+        saveArray(countPath, weights.astype(np.int64))
+    saveArray(colorPath, labColors.astype(np.float32))
+    evictPixels(key)
+    return loadPixels(key, weights is not None)
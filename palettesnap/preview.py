@@ -7,11 +7,11 @@ import os
 import subprocess
 import psutil
 import toml
+from PIL import ImageColor
 
 # Internal modules
 from . import setup
 from .console import console
-from .colorClass import hexToRgb
 
 ###
 # Terminal function
@@ -79,9 +79,9 @@ def colorRow(label : str, hexColor : str, colorDict : dict[str, str]) -> str:
     maxLen = max([len(key) for key in colorDict])
     text = "PaletteSnap"[:maxLen]
     row = label + " " * (maxLen - len(label)) + "|"
-    fgColor = hexToRgb(hexColor)
+    fgColor = ImageColor.getcolor(hexColor, "RGB")
     for key in colorDict:
-        bgColor = hexToRgb(colorDict[key])
+        bgColor = ImageColor.getcolor(colorDict[key], "RGB")
         row = row + rgbToAnsi(fgColor, bgColor, text) + "|"
     row = row[:-1] + "\n"
     return row
@@ -105,22 +105,24 @@ def printColors(colorDict : dict[str, str]) -> None:
 ###
 # Main function
 ###
+def previewImage() -> None:
+    '''prints the palette image in the terminal'''
+    palette = readPalette()
+    # Get terminal type and print image
+    terminal = getTerminal()
+    showImage(palette["image"], terminal)
+
+def previewColors() -> None:
+    '''prints the palette colors in the terminal'''
+    palette = readPalette()
+    palette.pop("image")
+    palette.pop("mode")
+    printColors(palette)
+
 def previewPalette(imageFlag) -> None:
     # Get image path and colors
     console.log("Terminal must support [blue]24-bit / true color[/blue] for previewing to work.")
     if imageFlag:
-        palette = readPalette()
-        imgPath = palette["image"]
-        palette.pop("image")
-        palette.pop("mode")
-        # Get terminal type and print image
-        terminal = getTerminal()
-        showImage(imgPath, terminal)
-        # Print colors
-        printColors(palette)
-    else:
-        # Only print the colors
-        palette = readPalette()
-        palette.pop("image")
-        palette.pop("mode")
-        printColors(palette)
+        previewImage()
+    # Print colors
+    previewColors()
@@ -2,31 +2,43 @@
 # Modules
 ###
 # External modules
+import re
+import psutil
 import subprocess
 from os import chdir
 from shlex import split
 
 # Internal modules
 from .setup import home
-from .console import console
 
 ###
 # Helper Function
 ###
-def isProgramOpen(name):
-    '''checks if program is currently open or not'''
-    output = subprocess.run(f"pgrep -a {name}", shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if output.returncode == 0:
-        return True
-    else:
+def findProcessNames() -> list[str]:
+    '''returns the names of all running processes'''
+    processNames = []
+    for proc in psutil.process_iter(["name"]):
+        if proc.info["name"]:
+            processNames.append(proc.info["name"])
+    return processNames
+
+def isProgramOpen(name, processNames : list[str] | None = None) -> bool:
+    '''checks if program is currently open or not, matching the name like pgrep'''
+    if processNames is None:
+        processNames = findProcessNames()
+    try:
+        pattern = re.compile(name)
+    except re.error:
         return False
+    return any(pattern.search(processName) for processName in processNames)
 
 ###
 # Main Function
 ###
-def refreshProgram(program, cmd):
-    '''refresh opened programs'''
-    if isProgramOpen(program):
-        console.log(f"Refreshing [u]{program}[/u]")
+def refreshProgram(program, cmd, processNames : list[str] | None = None) -> bool:
+    '''refresh opened programs and returns whether the program was refreshed'''
+    if isProgramOpen(program, processNames):
         cmdList = split(cmd)
-        subprocess.run(cmdList)
\ No newline at end of file
+        subprocess.run(cmdList)
+        return True
+    return False
\ No newline at end of file
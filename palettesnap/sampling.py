@@ -0,0 +1,101 @@
+###
+# Modules
+###
+
+# External Modules
+import math
+import numpy as np
+import numpy.typing as npt
+
+###
+# Helper Functions
+###
+samplingMethods = ["stride", "resize", "random"]
+
+def findStep(height : int, width : int, maxPixels : int) -> int:
+    '''returns the smallest step so that the image has at most maxPixels pixels left'''
+    step = max(1, math.floor(math.sqrt(height * width / maxPixels)))
+    while math.ceil(height / step) * math.ceil(width / step) > maxPixels:
+        step += 1
+    return step
+
+def packColors(rgb8 : npt.NDArray[any]) -> npt.NDArray[np.uint32]:
+    '''packs 8-bit colors into 24-bit integers'''
+    rgb8 = np.asarray(rgb8, dtype=np.uint32)
+    return (rgb8[..., 0] << 16) | (rgb8[..., 1] << 8) | rgb8[..., 2]
+
+def unpackColors(packed : npt.NDArray[any]) -> npt.NDArray[np.uint8]:
+    '''unpacks 24-bit integers into 8-bit colors'''
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([packed >> 16, (packed >> 8) & 255, packed & 255], axis=-1).astype(np.uint8)
+
+def to8bit(rgbColors : npt.NDArray[any]) -> npt.NDArray[np.uint8]:
+    '''rounds sRGB colors in [0, 1] to 8-bit colors'''
+    if rgbColors.dtype == np.uint8:
+        return rgbColors
+    return np.round(np.clip(rgbColors, 0, 1) * 255).astype(np.uint8)
+
+###
+# Sampling Functions
+###
+def strideColors(rgbColors : npt.NDArray[any], step : int) -> npt.NDArray[any]:
+    '''keeps every step-th row and column of the image'''
+    return rgbColors[::step, ::step]
+
+def resizeColors(rgbColors : npt.NDArray[any], step : int) -> npt.NDArray[any]:
+    '''averages step x step blocks of the image, dropping incomplete blocks'''
+    height, width, channels = rgbColors.shape
+    newHeight, newWidth = height // step, width // step
+    blocks = rgbColors[:newHeight * step, :newWidth * step]
+    blocks = blocks.reshape((newHeight, step, newWidth, step, channels))
+    return blocks.mean(axis=(1, 3))
+
+def strideSample(rgbColors : npt.NDArray[any], maxPixels : int) -> npt.NDArray[any]:
+    '''keeps every step-th row and column of the image'''
+    height, width = rgbColors.shape[:2]
+    step = findStep(height, width, maxPixels)
+    return strideColors(rgbColors, step)
+
+def resizeSample(rgbColors : npt.NDArray[any], maxPixels : int) -> npt.NDArray[any]:
+    '''averages step x step blocks of the image'''
+    height, width = rgbColors.shape[:2]
+    step = findStep(height, width, maxPixels)
+    if height < step or width < step:
+        # image is too thin to have full blocks
+        return strideColors(rgbColors, step)
+    return resizeColors(rgbColors, step)
+
+def randomSample(rgbColors : npt.NDArray[any], maxPixels : int, seed : int) -> npt.NDArray[any]:
+    '''picks maxPixels pixels uniformly at random'''
+    channels = rgbColors.shape[-1]
+    rgbColors = rgbColors.reshape((-1, channels))
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(rgbColors), size=maxPixels, replace=False)
+    # keep image order for reproducible downstream results
+    idx.sort()
+    return rgbColors[idx]
+
+def sampleColors(rgbColors : npt.NDArray[any], maxPixels : int, method : str, seed : int = 0) -> npt.NDArray[any]:
+    '''returns at most maxPixels colors of the image using the given sampling method'''
+    height, width = rgbColors.shape[:2]
+    if maxPixels <= 0 or height * width <= maxPixels:
+        return rgbColors
+    if method == "stride":
+        return strideSample(rgbColors, maxPixels)
+    elif method == "resize":
+        return resizeSample(rgbColors, maxPixels)
+    elif method == "random":
+        return randomSample(rgbColors, maxPixels, seed)
+    else:
+        raise Exception(f"{method} is not a valid sampling method.")
+
+###
+# Deduplication Function
+###
+def deduplicateColors(rgbColors : npt.NDArray[any]) -> tuple[npt.NDArray[any], npt.NDArray[np.int64]]:
+    '''returns the distinct 8-bit colors of the image and the number of pixels of each color'''
+    # pack colors into 24-bit integers so np.unique works on a flat array
+    packed = packColors(to8bit(rgbColors.reshape((-1, 3))))
+    packed, counts = np.unique(packed, return_counts=True)
+    uniqueColors = unpackColors(packed) / 255
+    return uniqueColors, counts
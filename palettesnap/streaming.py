@@ -0,0 +1,126 @@
+###
+# Modules
+###
+
+# External Modules
+import math
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+
+# Internal Modules
+from .sampling import findStep, strideColors, resizeColors, packColors, unpackColors, to8bit
+from .lut import convertColors
+
+###
+# Incremental statistics
+###
+class Reservoir():
+    '''uniform random sample of a fixed number of colors from a stream of colors'''
+
+    def __init__(self, size : int, seed : int = 0):
+        '''Initialize empty reservoir'''
+        self.size = size
+        self.seen = 0
+        self.colors = None
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, colors : npt.NDArray[any]) -> None:
+        '''adds a block of colors to the stream'''
+        if self.colors is None:
+            self.colors = np.empty((self.size, colors.shape[1]), dtype=colors.dtype)
+        # fill the reservoir first
+        numFill = min(max(self.size - self.seen, 0), len(colors))
+        self.colors[self.seen:self.seen + numFill] = colors[:numFill]
+        # then the i-th color replaces a random slot with probability size / (i + 1)
+        rest = colors[numFill:]
+        colorIdx = np.arange(self.seen + numFill, self.seen + len(colors))
+        slots = self.rng.integers(0, colorIdx + 1)
+        keep = slots < self.size
+        self.colors[slots[keep]] = rest[keep]
+        self.seen += len(colors)
+
+    def result(self) -> npt.NDArray[any]:
+        '''returns the sampled colors'''
+        return self.colors[:min(self.seen, self.size)]
+
+class ColorCounts():
+    '''number of pixels of every 24-bit color in a stream of colors'''
+
+    def __init__(self):
+        '''Initialize histogram of all 24-bit colors'''
+        self.counts = np.zeros(2 ** 24, dtype=np.int64)
+
+    def add(self, colors : npt.NDArray[any]) -> None:
+        '''adds a block of colors to the stream'''
+        packed, counts = np.unique(packColors(to8bit(colors)), return_counts=True)
+        self.counts[packed] += counts
+
+    def result(self) -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.int64]]:
+        '''returns the distinct 8-bit colors and their number of pixels'''
+        packed = np.flatnonzero(self.counts)
+        return unpackColors(packed), self.counts[packed]
+
+###
+# Helper Functions
+###
+def openImage(imgPath : str, maxPixels : int, sampling : str) -> tuple[Image.Image, int]:
+    '''opens the image without decoding it and returns it with the sampling step'''
+    image = Image.open(imgPath)
+    width, height = image.size
+    if maxPixels <= 0 or sampling == "random" or width * height <= maxPixels:
+        return image, 1
+    # JPEG images can be decoded at a reduced scale directly
+    step = findStep(height, width, maxPixels)
+    image.draft("RGB", (math.ceil(width / step), math.ceil(height / step)))
+    width, height = image.size
+    if width * height <= maxPixels:
+        return image, 1
+    return image, findStep(height, width, maxPixels)
+
+def addColors(colors : npt.NDArray[any], lut : str, counts : ColorCounts | None, labStrips : list[npt.NDArray[np.float32]]) -> None:
+    '''counts the colors if deduplicating, else converts them to Oklab'''
+    if counts is not None:
+        counts.add(colors)
+    else:
+        labStrips.append(convertColors(colors, lut).astype(np.float32))
+
+###
+# Main Function
+###
+def streamImage(imgPath : str, maxPixels : int, sampling : str, dedup : bool, lut : str,
+                stripHeight : int = 256) -> tuple[npt.NDArray[any], npt.NDArray[np.int64] | None]:
+    '''converts the decoded image strip by strip and returns its Oklab colors and their counts if deduplicated'''
+    # PIL decodes the whole image on the first crop, at reduced scale for JPEG drafts,
+    # so only the 8-bit image and the sampled or distinct colors stay in memory
+    image, step = openImage(imgPath, maxPixels, sampling)
+    width, height = image.size
+    # strips start on a multiple of the step so sampling matches the whole image
+    stripHeight = step * max(1, stripHeight // step)
+    reservoir = None
+    if maxPixels > 0 and sampling == "random" and width * height > maxPixels:
+        reservoir = Reservoir(maxPixels)
+    counts = ColorCounts() if dedup else None
+    labStrips = []
+    for top in range(0, height, stripHeight):
+        strip = image.crop((0, top, width, min(top + stripHeight, height)))
+        # convert each strip so other modes never need a second full size image
+        if strip.mode != "RGB":
+            strip = strip.convert("RGB")
+        strip = np.asarray(strip)
+        if step > 1 and sampling == "resize":
+            strip = resizeColors(strip / 255, step)
+        elif step > 1:
+            strip = strideColors(strip, step)
+        colors = strip.reshape((-1, 3))
+        if reservoir is not None:
+            reservoir.add(colors)
+        else:
+            addColors(colors, lut, counts, labStrips)
+    if reservoir is not None:
+        addColors(reservoir.result(), lut, counts, labStrips)
+    # convert the distinct colors
+    if counts is not None:
+        rgb8, weights = counts.result()
+        return convertColors(rgb8, lut), weights
+    return np.concatenate(labStrips), None
@@ -4,16 +4,30 @@
 
 # External modules
 import os
+import json
+import time
+import shutil
+import hashlib
+import threading
 import toml
+import concurrent.futures
 from string import Template
-from re import sub, findall
+from re import compile
 
 # Internal modules
 from . import setup
-from .refresh import refreshProgram
+from .refresh import refreshProgram, findProcessNames
 from .console import console
 from .colorClass import Color
 
+###
+# Template settings
+###
+# maximum number of templates generated and refreshed at the same time
+templateWorkers = 8
+# compiled templates are cached by template path and modification time
+compiledPath = os.path.join(setup.cache, "templates.json")
+
 ###
 # PaletteSnap built-in export functions
 ###
@@ -126,81 +140,146 @@ def exportCSS(colorDict : dict[str, Color]) -> None:
     output.close()
 
 ###
-# Template export functions
+# Template compiler
 ###
-def replaceVar(tempContents : str, palette : dict[str, Color]) -> str:
-    '''replaces variable in template with colors in palette'''
-    # replace vars with colors
-    modePattern = r"\{\{mode \| (.*?) \| (.*?)\}\}"
-    for key in palette:
-        if key == "image" or key == "mode":
-            # image/mode
-            tempContents = tempContents.replace("{{" + key + "}}", palette[key])
-            # special case for image
-            tempContents = tempContents.replace("{{image.name}}", os.path.basename(palette[key]))
-            # special case for mode
-            mode = palette["mode"]
-            tempContents = sub(modePattern, lambda match: match.group(1) if mode == 'light' else match.group(2), tempContents)
-        else:
-            # hex
-            tempContents = tempContents.replace("{{" + key + "}}", palette[key].hex)
-            tempContents = tempContents.replace("{{" + key + ".digits}}", (palette[key].hex)[1:])
-            # rgb
-            tempContents = tempContents.replace("{{" + key + ".r}}", str(palette[key].rgb[0]))
-            tempContents = tempContents.replace("{{" + key + ".g}}", str(palette[key].rgb[1]))
-            tempContents = tempContents.replace("{{" + key + ".b}}", str(palette[key].rgb[2]))
-            # normalized rgb
-            tempContents = tempContents.replace("{{" + key + ".nr}}", str(palette[key].normalRgb[0]))
-            tempContents = tempContents.replace("{{" + key + ".ng}}", str(palette[key].normalRgb[1]))
-            tempContents = tempContents.replace("{{" + key + ".nb}}", str(palette[key].normalRgb[2]))
-            # hsl
-            tempContents = tempContents.replace("{{" + key + ".h}}", str(palette[key].hsl[0]))
-            tempContents = tempContents.replace("{{" + key + ".s}}", str(palette[key].hsl[1]))
-            tempContents = tempContents.replace("{{" + key + ".l}}", str(palette[key].hsl[2]))
-    # lighten, darken, and mode inverse
-    lightenPattern = r"\{\{(.*?).lighten\(([0-9.\d]+)\)\}\}"
-    darkenPattern = r"\{\{(.*?).darken\(([0-9.\d]+)\)\}\}"
-    modeInversePattern = r"\{\{(.*?).modeInverse\(([0-9.\d]+)\)\}\}"
-    lightenMatches = findall(lightenPattern, tempContents)
-    darkenMatches = findall(darkenPattern, tempContents)
-    modeInverseMatches = findall(modeInversePattern, tempContents)
-    for match in lightenMatches:
-        name = match[0]
-        value = float(match[1])
-        if name in palette:
-            currColor = palette[name]
-            tempContents = tempContents.replace("{{" + name + ".lighten(" + str(value) + ")}}", Color.lighten(currColor, value).hex)
-        else:
-            console.log(f"Cannot lighten {name} with value {value}")
-    for match in darkenMatches:
-        name = match[0]
-        value = float(match[1])
-        if name in palette:
-            currColor = palette[name]
-            tempContents = tempContents.replace("{{" + name + ".darken(" + str(value) + ")}}", Color.darken(currColor, value).hex)
+# variables start at the innermost {{ so extra braces around them are kept as text
+varPattern = compile(r"\{\{(?!\{)((?:(?!\{\{).)*?)\}\}")
+modePattern = compile(r"mode \| (.*?) \| (.*?)")
+adjustPattern = compile(r"(.*?)\.(lighten|darken|modeInverse)\(([0-9.\d]+)\)")
+# color attributes given by the color property and its index
+colorAttributes = {
+    "r": ("rgb", 0), "g": ("rgb", 1), "b": ("rgb", 2),
+    "nr": ("normalRgb", 0), "ng": ("normalRgb", 1), "nb": ("normalRgb", 2),
+    "h": ("hsl", 0), "s": ("hsl", 1), "l": ("hsl", 2),
+}
+
+def compileVar(var : str) -> list[str]:
+    '''parses the text between {{ and }} into a token that keeps the text'''
+    match = modePattern.fullmatch(var)
+    if match is not None:
+        return ["mode", var, match.group(1), match.group(2)]
+    match = adjustPattern.fullmatch(var)
+    if match is not None:
+        return ["adjust", var, match.group(1), match.group(2), match.group(3)]
+    key, dot, attribute = var.rpartition(".")
+    if dot == "" or (attribute not in colorAttributes and attribute not in ["digits", "name"]):
+        key, attribute = var, ""
+    return ["var", var, key, attribute]
+
+def compileTemplate(tempContents : str) -> list[str | list[str]]:
+    '''splits a template into text and variable tokens'''
+    tokens = []
+    parts = varPattern.split(tempContents)
+    # text and variables alternate
+    for idx, part in enumerate(parts):
+        if idx % 2 == 0:
+            if part != "":
+                tokens.append(part)
         else:
-            console.log(f"Cannot darken {name} with value {value}")
-    for match in modeInverseMatches:
-        mode = palette["mode"]
-        name = match[0]
-        value = float(match[1])
+            tokens.append(compileVar(part))
+    return tokens
+
+def renderVar(token : list[str], palette : dict[str, Color], log) -> str | None:
+    '''returns the value of a variable token or None if the palette does not define it'''
+    kind = token[0]
+    if kind == "mode":
+        return token[2] if palette["mode"] == "light" else token[3]
+    if kind == "adjust":
+        name, adjust, value = token[2], token[3], float(token[4])
+        if name not in palette:
+            action = "apply mode inverse to" if adjust == "modeInverse" else adjust
+            log(f"Cannot {action} {name} with value {value}")
+            return None
         # mode inverse darkens a color if the mode is light
         # mode inverse lightens a color if the mode is dark
-        if name in palette:
-            currColor = palette[name]
-            if mode == "light":
-                newColor = Color.darken(currColor, value).hex
+        if adjust == "modeInverse":
+            adjust = "darken" if palette["mode"] == "light" else "lighten"
+        if adjust == "lighten":
+            return Color.lighten(palette[name], value).hex
+        return Color.darken(palette[name], value).hex
+    key, attribute = token[2], token[3]
+    if key not in palette:
+        return None
+    if key == "image" or key == "mode":
+        # image/mode
+        if attribute == "":
+            return palette[key]
+        if key == "image" and attribute == "name":
+            return os.path.basename(palette[key])
+        return None
+    color = palette[key]
+    if attribute == "":
+        return color.hex
+    elif attribute == "digits":
+        return color.hex[1:]
+    elif attribute in colorAttributes:
+        # rgb, normalized rgb, and hsl
+        name, idx = colorAttributes[attribute]
+        value = getattr(color, name)[idx]
+        if name == "normalRgb":
+            # 12 significant digits like numpy floats under colour's print options,
+            # so computed and precomputed colors render the same
+            return str(float(f"{value:.12g}"))
+        return str(value)
+    return None
+
+def renderTemplate(tokens : list[str | list[str]], palette : dict[str, Color], messages : list[str] | None = None) -> str:
+    '''fills in a compiled template with colors in palette in a single pass'''
+    log = console.log if messages is None else messages.append
+    parts = []
+    # every distinct variable is only computed once
+    values = dict()
+    for token in tokens:
+        if isinstance(token, str):
+            parts.append(token)
+            continue
+        value = values.get(token[1])
+        if value is None:
+            value = renderVar(token, palette, log)
+            if value is None:
+                # leave unknown variables as they are
+                value = "{{" + token[1] + "}}"
             else:
-                newColor = Color.lighten(currColor, value).hex
-            tempContents = tempContents.replace("{{" + name + ".modeInverse(" + str(value) + ")}}", newColor)
-        else:
-            console.log(f"Cannot apply mode inverse to {name} with value {value}")
-    return tempContents
+                values[token[1]] = value
+        parts.append(value)
+    return "".join(parts)
 
-def exportTemplates(palette : dict[str, Color]) -> None:
-    '''export templates'''
-    console.log("Generating templates.")
-    templateInfo = toml.load(setup.templateFile)
+def replaceVar(tempContents : str, palette : dict[str, Color], messages : list[str] | None = None) -> str:
+    '''replaces variable in template with colors in palette, adding warnings to messages if given'''
+    return renderTemplate(compileTemplate(tempContents), palette, messages)
+
+def loadCompiled() -> dict[str, dict]:
+    '''returns the compiled templates cached in the cache dir'''
+    try:
+        with open(compiledPath, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return dict()
+
+def saveCompiled(compiled : dict[str, dict]) -> None:
+    '''caches the compiled templates in the cache dir'''
+    tempPath = f"{compiledPath}.{os.getpid()}.tmp"
+    with open(tempPath, "w") as file:
+        json.dump(compiled, file)
+    os.replace(tempPath, compiledPath)
+
+def findCompiled(tempLoc : str, compiled : dict[str, dict]) -> list[str | list[str]]:
+    '''returns the compiled template, compiling it again if the template changed'''
+    mtime = os.path.getmtime(tempLoc)
+    entry = compiled.get(tempLoc)
+    if entry is None or entry["mtime"] != mtime:
+        with open(tempLoc, "r") as file:
+            contents = file.read()
+        entry = {"mtime": mtime, "tokens": compileTemplate(contents)}
+        compiled[tempLoc] = entry
+    return entry["tokens"]
+
+###
+# Template export functions
+###
+def findTemplates(templateInfo : dict[str, list[dict[str, str]]]) -> list[dict[str, str]]:
+    '''returns the program, template, export path, and refresh command of every template'''
+    templates = []
     for program in templateInfo:
         programInfo : list[dict[str, str]] = templateInfo[program]
         for tempDict in programInfo:
@@ -219,25 +298,89 @@ def exportTemplates(palette : dict[str, Color]) -> None:
                 alias = name
             if dir == "":
                 dir = setup.cache
-            # replace variables for template
-            tempLoc = os.path.join(setup.templateDir, name)
-            exportLoc = os.path.join(dir, alias)
-            # check if template file exists
-            if os.path.isfile(tempLoc):
-                file = open(tempLoc, "r")
-                template = file.read()
-                file.close()
-                # generate the file based on the template
-                newContents = replaceVar(template, palette)
-                with open(exportLoc, "w") as newFile:
-                    newFile.write(newContents)
-                newFile.close()
-                console.log(f"Template {name} succesfully generated.")
-            else:
-                console.log(f"Template {name} does not exist.")
-            # refresh the program
-            if cmd != "":
-                refreshProgram(program, cmd)
+            templates.append({
+                "program": program,
+                "name": name,
+                "tempLoc": os.path.join(setup.templateDir, name),
+                "exportLoc": os.path.join(dir, alias),
+                "cmd": cmd,
+            })
+    return templates
+
+def findHash(contents : str) -> str:
+    '''returns the hash of the file contents'''
+    return hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+def writeChanged(exportLoc : str, newContents : str) -> bool:
+    '''writes the file atomically if its contents changed and returns whether it was written'''
+    # write through symlinks to the actual file
+    exportLoc = os.path.realpath(exportLoc)
+    try:
+        with open(exportLoc, "r") as file:
+            if findHash(file.read()) == findHash(newContents):
+                return False
+    except (OSError, UnicodeDecodeError):
+        # file does not exist or cannot be read, so write it
+        pass
+    tempPath = f"{exportLoc}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tempPath, "w") as newFile:
+        newFile.write(newContents)
+    if os.path.exists(exportLoc):
+        shutil.copymode(exportLoc, tempPath)
+    os.replace(tempPath, exportLoc)
+    return True
+
+def exportTemplate(palette : dict[str, Color], template : dict[str, str], compiled : dict[str, dict],
+                   processNames : list[str]) -> tuple[list[str], bool]:
+    '''generates one template and refreshes its program, returning the messages to log and whether it was unchanged'''
+    messages = []
+    name = template["name"]
+    # check if template file exists
+    if os.path.isfile(template["tempLoc"]):
+        start = time.perf_counter()
+        # generate the file based on the template
+        tokens = findCompiled(template["tempLoc"], compiled)
+        newContents = renderTemplate(tokens, palette, messages)
+        if not writeChanged(template["exportLoc"], newContents):
+            # nothing to refresh either
+            messages.append(f"Template {name} is unchanged.")
+            return messages, True
+        end = time.perf_counter()
+        messages.append(f"Template {name} succesfully generated in {end-start:.3f} seconds.")
+    else:
+        messages.append(f"Template {name} does not exist.")
+    # refresh the program
+    if template["cmd"] != "":
+        start = time.perf_counter()
+        if refreshProgram(template["program"], template["cmd"], processNames):
+            end = time.perf_counter()
+            messages.append(f"Refreshed [u]{template['program']}[/u] in {end-start:.3f} seconds.")
+    return messages, False
+
+def exportTemplates(palette : dict[str, Color]) -> None:
+    '''export templates'''
+    console.log("Generating templates.")
+    templateInfo = toml.load(setup.templateFile)
+    templates = findTemplates(templateInfo)
+    compiled = loadCompiled()
+    mtimes = {tempLoc: entry["mtime"] for tempLoc, entry in compiled.items()}
+    skipped = 0
+    # one snapshot of the running processes is shared by all refresh commands
+    processNames = findProcessNames() if any(template["cmd"] != "" for template in templates) else []
+    # templates are generated and refreshed concurrently, but logged in the order of templates.toml
+    with concurrent.futures.ThreadPoolExecutor(max_workers=templateWorkers) as executor:
+        results = executor.map(lambda template: exportTemplate(palette, template, compiled, processNames), templates)
+        for messages, unchanged in results:
+            for message in messages:
+                console.log(message)
+            skipped += unchanged
+    if skipped > 0:
+        console.log(f"Skipped {skipped} unchanged templates.")
+    # only keep templates that are still used
+    tempLocs = {template["tempLoc"] for template in templates}
+    compiled = {tempLoc: entry for tempLoc, entry in compiled.items() if tempLoc in tempLocs}
+    if {tempLoc: entry["mtime"] for tempLoc, entry in compiled.items()} != mtimes:
+        saveCompiled(compiled)
 
 ###
 # Export all